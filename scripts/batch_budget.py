@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+按 token 预算给 Gemini 分类组批，代替固定的 25 条一批。
+
+- 输入：按「字符数 / 每 token 字符数」估算，整批不超过 GEMINI_BATCH_INPUT_TOKENS
+- 输出：按「每条结果的 token 数」估算，整批不超过 maxOutputTokens 的 OUTPUT_HEADROOM，
+  避免回复被截断后整批 JSON 解析失败
+- 每次请求后用响应里的 usageMetadata 修正这两个比例；回复被截断（MAX_TOKENS）时
+  本次运行内把输出估计乘上一个放大系数，之后每个完整的回复让它逐步回落
+
+学到的比例存到 data/classify_budget.json，下次运行从上次的值开始；
+放大系数不保存，保存和读取的值都限制在 MAX_OUTPUT_PER_ITEM 以内。
+"""
+
+import os
+import json
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(BASE_DIR, 'data', 'classify_budget.json')
+INPUT_TOKEN_BUDGET = int(os.getenv('GEMINI_BATCH_INPUT_TOKENS', '8000'))
+MAX_BATCH = int(os.getenv('GEMINI_MAX_BATCH', '100'))
+# 输出只用到 maxOutputTokens 的这个比例，给估计误差留余量
+OUTPUT_HEADROOM = 0.75
+# 新观测值的权重（指数移动平均）
+EMA_ALPHA = 0.3
+# 峰值每次观测后向均值回落的比例
+PEAK_DECAY = 0.95
+# 没有历史数据时的初始值
+DEFAULT_CHARS_PER_TOKEN = 3.0
+DEFAULT_OUTPUT_PER_ITEM = 80.0
+# 单条结果输出估计的上限（tags + 分数 + 一句摘要远用不到这么多）
+MAX_OUTPUT_PER_ITEM = 400.0
+# 截断后放大系数的上限
+MAX_TRUNCATION_FACTOR = 4.0
+
+
+class TokenBudget:
+    def __init__(self, max_output_tokens, input_budget=INPUT_TOKEN_BUDGET, max_batch=MAX_BATCH,
+                 budget_file=BUDGET_FILE):
+        self.max_output_tokens = max_output_tokens
+        self.input_budget = input_budget
+        self.max_batch = max_batch
+        self.budget_file = budget_file
+        self.chars_per_token = DEFAULT_CHARS_PER_TOKEN
+        self.output_per_item = DEFAULT_OUTPUT_PER_ITEM
+        self.output_peak = DEFAULT_OUTPUT_PER_ITEM
+        # 本次运行中截断导致的放大系数，不保存
+        self.truncation_factor = 1.0
+        self.truncated = 0
+        self.lock = threading.Lock()
+        if os.path.exists(budget_file):
+            try:
+                with open(budget_file, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                self.chars_per_token = float(saved['chars_per_token'])
+                # 旧版本可能存下了被截断放大过的值
+                self.output_per_item = min(MAX_OUTPUT_PER_ITEM, float(saved['output_per_item']))
+                self.output_peak = min(MAX_OUTPUT_PER_ITEM, float(saved.get('output_peak', self.output_per_item)))
+            except (json.JSONDecodeError, OSError, KeyError, TypeError, ValueError) as e:
+                print(f"⚠️ 读取批次预算失败，使用默认值: {e}")
+
+    def item_output_tokens(self):
+        """单条结果的输出估计（取均值和近期峰值中较大的，乘上截断放大系数）"""
+        return min(MAX_OUTPUT_PER_ITEM, max(self.output_per_item, self.output_peak) * self.truncation_factor)
+
+    def max_items(self):
+        """按输出预算一批最多放几条"""
+        with self.lock:
+            n = int(self.max_output_tokens * OUTPUT_HEADROOM // self.item_output_tokens())
+        return max(1, min(self.max_batch, n))
+
+    def estimate(self, input_chars, n_items):
+        """估算一次请求的 (输入, 输出) token 数"""
+        with self.lock:
+            return (int(input_chars / self.chars_per_token),
+                    int(self.item_output_tokens() * n_items))
+
+    def take_batch(self, queue, overhead_chars, item_chars):
+        """从 queue（deque）头部取出尽量多、又不超预算的一批；item_chars(item) 为单条占用的字符数"""
+        limit = self.max_items()
+        budget_chars = self.input_budget * self.chars_per_token - overhead_chars
+        batch = []
+        used = 0
+        while queue and len(batch) < limit:
+            size = item_chars(queue[0])
+            if batch and used + size > budget_chars:
+                break
+            batch.append(queue.popleft())
+            used += size
+        return batch
+
+    def observe(self, input_chars, n_items, usage, truncated=False):
+        """用一次响应的 usageMetadata 修正估计"""
+        with self.lock:
+            prompt_tokens = (usage or {}).get('promptTokenCount')
+            output_tokens = (usage or {}).get('candidatesTokenCount')
+            if prompt_tokens:
+                ratio = input_chars / prompt_tokens
+                self.chars_per_token += EMA_ALPHA * (ratio - self.chars_per_token)
+            if truncated:
+                # 截断时 usage 只反映被截掉前的部分，不计入均值和峰值，只在本次运行内放大估计
+                self.truncated += 1
+                self.truncation_factor = min(MAX_TRUNCATION_FACTOR, self.truncation_factor * 1.5)
+            elif output_tokens and n_items:
+                per_item = min(MAX_OUTPUT_PER_ITEM, output_tokens / n_items)
+                self.output_per_item += EMA_ALPHA * (per_item - self.output_per_item)
+                self.output_peak = max(per_item, self.output_peak * PEAK_DECAY, self.output_per_item)
+                self.truncation_factor = max(1.0, self.truncation_factor * PEAK_DECAY)
+
+    def save(self):
+        tmp_file = self.budget_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'chars_per_token': round(self.chars_per_token, 3),
+                'output_per_item': round(self.output_per_item, 1),
+                'output_peak': round(self.output_peak, 1),
+            }, f, indent=2)
+        os.replace(tmp_file, self.budget_file)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+prompt 提取引擎的微基准 + 一致性校验。
+
+在完整的 data/raw 语料上分别运行旧实现（逐条 re.search）和 extract_prompts.extract_prompt_text，
+逐条比对输出，报告前后每秒处理推文数。输出不一致时以非零状态退出。
+
+用法：python scripts/bench_extract.py [--repeat N]
+"""
+
+import re
+import sys
+import time
+
+from raw_io import list_raw_files, iter_raw
+from tweet_store import tweet_key
+from extract_prompts import extract_prompt_text
+
+
+def extract_prompt_text_reference(text):
+    """旧实现：每条推文逐个 re.search，作为正确性基准"""
+    if not text:
+        return None
+
+    text_clean = text.replace('""', '"')
+
+    # Pattern 1: Prompt: "xxx" 或 Prompt: xxx
+    prompt_patterns = [
+        r'[Pp][Rr][Oo][Mm][Pp][Tt]\s*(?:\(.*?\))?\s*[:：]\s*["""\'](.+?)["""\']',
+        r'[Pp][Rr][Oo][Mm][Pp][Tt]\s*(?:\(.*?\))?\s*[:：]\s*(.+?)(?:\n\n|https://|$)',
+        r'PROMPT\s*[:：]\s*["""\'](.+?)["""\']',
+    ]
+
+    for pattern in prompt_patterns:
+        match = re.search(pattern, text_clean, re.DOTALL | re.IGNORECASE)
+        if match:
+            prompt = match.group(1).strip()
+            prompt = re.sub(r'\s*#\w+.*$', '', prompt, flags=re.DOTALL)
+            prompt = re.sub(r'\s*https://t\.co/\S+', '', prompt)
+            prompt = prompt.strip().strip('"').strip("'").strip('\u201c').strip('\u201d')
+            if len(prompt) > 10:
+                return prompt
+
+    # Pattern 2: 引号包裹的内容
+    text_lower = text_clean.lower()
+    if 'seedance' in text_lower:
+        quoted = re.findall(r'"([^"]{15,})"', text_clean)
+        if not quoted:
+            quoted = re.findall(r'\u201c([^\u201d]{15,})\u201d', text_clean)
+        if quoted:
+            longest = max(quoted, key=len)
+            if len(longest) > 15:
+                return longest.strip()
+
+    # Pattern 3: JSON 格式
+    if '{' in text_clean and 'title' in text_lower:
+        json_match = re.search(r'\{[\s\S]+\}', text_clean)
+        if json_match and len(json_match.group(0)) > 50:
+            return json_match.group(0).strip()
+
+    # Pattern 4: 中文结构化 prompt
+    if '【' in text_clean and ('prompt' in text_lower or '文生视频' in text_clean):
+        struct_match = re.search(r'(【.+)', text_clean, re.DOTALL)
+        if struct_match:
+            prompt = struct_match.group(1).strip()
+            prompt = re.sub(r'\s*#\w+.*$', '', prompt, flags=re.DOTALL)
+            prompt = re.sub(r'\s*https://t\.co/\S+', '', prompt)
+            if len(prompt) > 20:
+                return prompt.strip()
+
+    return None
+
+
+def load_corpus():
+    """读取全部 raw 快照中的推文正文（按 id 去重）"""
+    seen = set()
+    texts = []
+    for path in list_raw_files():
+        for tweet in iter_raw(path):
+            tid = tweet_key(tweet)
+            if tid and tid not in seen:
+                seen.add(tid)
+                texts.append(tweet.get('text', ''))
+    return texts
+
+
+def bench(fn, texts, repeat):
+    """返回 (最快一轮耗时, 输出列表)"""
+    best = None
+    outputs = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [fn(t) for t in texts]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, outputs
+
+
+def main(repeat=3):
+    texts = load_corpus()
+    print(f"📊 语料: {len(texts)} 条推文")
+
+    ref_time, ref_out = bench(extract_prompt_text_reference, texts, repeat)
+    new_time, new_out = bench(extract_prompt_text, texts, repeat)
+
+    mismatches = [i for i, (a, b) in enumerate(zip(ref_out, new_out)) if a != b]
+    print(f"  旧实现: {len(texts) / ref_time:,.0f} 条/秒 ({ref_time:.3f}s)")
+    print(f"  新实现: {len(texts) / new_time:,.0f} 条/秒 ({new_time:.3f}s)")
+    print(f"  加速比: {ref_time / new_time:.2f}x")
+    print(f"  命中 prompt: {sum(1 for o in new_out if o)} 条")
+
+    if mismatches:
+        print(f"❌ 输出不一致: {len(mismatches)} 条")
+        for i in mismatches[:5]:
+            print(f"   #{i}: {ref_out[i]!r} != {new_out[i]!r}")
+        return 1
+    print("✅ 输出与旧实现完全一致")
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark prompt extraction against the reference implementation')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing rounds (best is reported)')
+    args = parser.parse_args()
+    sys.exit(main(repeat=args.repeat))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+共享的黑名单索引 data/blacklist.txt。
+
+每行一个推文 URL 或 tweet id，# 开头为注释。URL 统一取 /status/<id> 作为规范 id，
+twitter.com / x.com / mobile.twitter.com、带查询串或 /photo/1 之类后缀的都算同一条推文；
+取不出 id 的行按原样做精确匹配。
+
+merge_dedup 在入库前就过滤掉黑名单推文，后续阶段不会再为它们提取和调用 Gemini；
+extract_prompts / generate_site 仍会检查一遍，用于拦截加入黑名单前已经入库的推文。
+从黑名单中移除后推文不会自动回来：需要 merge_dedup.py --full 才能把它补回存储，
+可以用 --since / --until 限定为推文发布那几天（例如 --full --since 2026-03-01 --until 2026-03-01）。
+
+load_blacklist() 按文件 mtime 缓存，同一进程内文件不变就只解析一次。
+"""
+
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLACKLIST_FILE = os.path.join(BASE_DIR, 'data', 'blacklist.txt')
+STATUS_RE = re.compile(r'/status(?:es)?/(\d+)')
+
+
+def canonical_tweet_id(value):
+    """从 tweet id 或推文 URL 中取出规范 id，取不出时返回空字符串"""
+    value = str(value or '').strip()
+    if value.isdigit():
+        return value
+    m = STATUS_RE.search(value)
+    return m.group(1) if m else ''
+
+
+class Blacklist:
+    def __init__(self, lines=()):
+        self.ids = set()
+        self.literals = set()
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            tid = canonical_tweet_id(line)
+            if tid:
+                self.ids.add(tid)
+            else:
+                self.literals.add(line)
+
+    def __len__(self):
+        return len(self.ids) + len(self.literals)
+
+    def __contains__(self, value):
+        """value 可以是 tweet id 或推文 URL"""
+        if not value:
+            return False
+        tid = canonical_tweet_id(value)
+        return (tid in self.ids) if tid else (str(value).strip() in self.literals)
+
+    def is_blocked(self, tweet):
+        return tweet.get('id', '') in self or tweet.get('url', '') in self
+
+
+_cache = {}
+
+
+def load_blacklist(blacklist_file=BLACKLIST_FILE):
+    """读取黑名单，文件不存在时返回空黑名单"""
+    if not os.path.exists(blacklist_file):
+        return Blacklist()
+    mtime = os.path.getmtime(blacklist_file)
+    cached = _cache.get(blacklist_file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(blacklist_file, 'r', encoding='utf-8') as f:
+        blacklist = Blacklist(f)
+    _cache[blacklist_file] = (mtime, blacklist)
+    return blacklist
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+按内容寻址的分类缓存 data/classify_cache.json，与 prompt_library 的结构无关。
+
+键 = sha1(模型 + SYSTEM_PROMPT 版本 + 完整归一化 prompt)，值为 tags / quality_score / summary。
+extract_prompts 重新提取时先查缓存补回分类，classify_prompts 只把缓存没命中的 prompt 发给 Gemini，
+所以去重胜出者变了、或者素材库文件重新生成，都不会为已分类过的 prompt 再付一次费。
+
+每条记录带最近使用日期，条目数超过 CLASSIFY_CACHE_MAX 时按最久未使用淘汰
+（模型或 SYSTEM_PROMPT 换了之后旧键不会再被使用，自然最先被淘汰）。
+"""
+
+import os
+import json
+import hashlib
+from datetime import date, timedelta
+from dotenv import load_dotenv
+
+from near_dedup import canonical_text
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(BASE_DIR, 'data', 'classify_cache.json')
+CACHE_MAX = int(os.getenv('CLASSIFY_CACHE_MAX', '50000'))
+# 最近使用日期的刷新粒度，避免每天改写全部条目
+TOUCH_DAYS = 7
+FIELDS = ('tags', 'quality_score', 'summary')
+
+
+class ClassifyCache:
+    def __init__(self, model, system_prompt, cache_file=CACHE_FILE, max_entries=CACHE_MAX):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.namespace = f"{model}\x00{hashlib.sha1(system_prompt.encode('utf-8')).hexdigest()[:12]}\x00"
+        self.entries = {}
+        self.dirty = False
+        self.hits = 0
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+            except (json.JSONDecodeError, OSError, AttributeError) as e:
+                print(f"⚠️ 读取分类缓存失败，重新开始: {e}")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, prompt):
+        return hashlib.sha1((self.namespace + canonical_text(prompt)).encode('utf-8')).hexdigest()
+
+    def get(self, prompt):
+        """命中时返回 {tags, quality_score, summary}，并刷新使用日期"""
+        entry = self.entries.get(self.key(prompt))
+        if entry is None:
+            return None
+        today = date.today()
+        if entry.get('used', '') < (today - timedelta(days=TOUCH_DAYS)).isoformat():
+            entry['used'] = today.isoformat()
+            self.dirty = True
+        self.hits += 1
+        return {k: entry[k] for k in FIELDS}
+
+    def put(self, prompt, classification):
+        """记录一条分类结果（没有 tags 的不记录）"""
+        if not classification.get('tags'):
+            return
+        entry = {k: classification.get(k, '' if k == 'summary' else 0) for k in FIELDS}
+        entry['tags'] = list(classification['tags'])
+        entry['used'] = date.today().isoformat()
+        key = self.key(prompt)
+        old = self.entries.get(key)
+        if old is not None and {k: old.get(k) for k in FIELDS} == {k: entry[k] for k in FIELDS}:
+            return
+        self.entries[key] = entry
+        self.dirty = True
+
+    def save(self):
+        """有改动时原子写回，超出上限时淘汰最久未使用的条目"""
+        if not self.dirty:
+            return
+        if len(self.entries) > self.max_entries:
+            keep = sorted(self.entries, key=lambda k: self.entries[k].get('used', ''), reverse=True)
+            self.entries = {k: self.entries[k] for k in keep[:self.max_entries]}
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': self.entries}, f, ensure_ascii=False, indent=0, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+        self.dirty = False
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+分类日志 data/classify_journal.jsonl：每个批次的结果只追加到这里，
+分类结束时一次性回放进素材库和分类缓存，然后删除日志。
+
+中途中断时日志还在，下次启动 classify_prompts 会先回放。记录按 prompt 内容
+（完整归一化文本的哈希）而不是素材库下标定位，所以中间重新跑过 extract_prompts 也能对上。
+"""
+
+import os
+import json
+
+from near_dedup import canonical_text
+from sqlite_store import prompt_hash
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOURNAL_FILE = os.path.join(BASE_DIR, 'data', 'classify_journal.jsonl')
+
+
+def journal_key(prompt):
+    return prompt_hash(canonical_text(prompt))
+
+
+class ClassifyJournal:
+    def __init__(self, journal_file=JOURNAL_FILE):
+        self.journal_file = journal_file
+
+    def exists(self):
+        return os.path.exists(self.journal_file)
+
+    def append_many(self, records):
+        """追加一批 {prompt, tags, quality_score, summary}，落盘后返回"""
+        if not records:
+            return
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            for r in records:
+                f.write(json.dumps(dict(r, key=journal_key(r['prompt'])), ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self):
+        """读取全部记录 {key: record}，后写的覆盖先写的，中断留下的半行忽略"""
+        records = {}
+        if not self.exists():
+            return records
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[r.pop('key')] = r
+        return records
+
+    def clear(self):
+        if self.exists():
+            os.remove(self.journal_file)
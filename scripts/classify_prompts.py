@@ -1,23 +1,69 @@
 #!/usr/bin/env python3
 """
 使用 Gemini REST API 对 prompt 素材进行智能分类。
-批量处理，每次约 25 条，减少 API 调用。
+批量处理，每批条数按 token 预算动态决定（batch_budget.py），减少 API 调用。
 只对未分类的 prompt 进行分类（增量处理）。
+
+多个批次并发请求（GEMINI_CONCURRENCY），由令牌桶按 RPM / TPM 配额限流（rate_limit.py）；
+429 / 503 时按 Retry-After 全体暂停并降速。GEMINI_API_BASE 可指向本地的 Gemini 替身做测试。
+分类结果同时写入内容寻址的分类缓存（classify_cache.py），命中缓存的 prompt 不再请求 Gemini。
+每批结果只追加到分类日志（classify_journal.py），素材库和缓存在结束时各写一次；
+中断后下次启动先回放日志。
+回复里格式错误或被截断的部分只丢对应的条目（json_stream.py），没分到的 prompt 重新排队；
+整批都没结果时对半拆开重试，单条反复失败才跳过。
+请求 Gemini 之前先跑本地预分类（local_classifier.py），置信度够高的直接采用；
+没有 API key 或 Gemini 没分出来的，用本地结果兜底。
+GEMINI_STREAM=1（或 --stream）时改用 :streamGenerateContent 流式接口，每条结果一到就写回，
+中途断开时已收到的结果照样保留。
 """
 
 import os
+import re
 import json
 import time
+import random
 import requests
+from collections import deque
+from queue import Queue, Empty
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
 
+from sqlite_store import SqliteStore, use_sqlite
+from rate_limit import RateLimiter
+from classify_cache import ClassifyCache
+from classify_journal import ClassifyJournal
+from batch_budget import TokenBudget
+from json_stream import JsonArrayStream
+from local_classifier import load_local_classifier
+from http_client import HttpClient
+
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-BATCH_SIZE = 25
 GEMINI_MODEL = 'gemini-2.0-flash'
-GEMINI_URL = f'https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent'
+GEMINI_API_BASE = os.getenv('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com/v1beta').rstrip('/')
+GEMINI_URL = f'{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent'
+GEMINI_STREAM_URL = f'{GEMINI_API_BASE}/models/{GEMINI_MODEL}:streamGenerateContent'
+GEMINI_STREAM = os.getenv('GEMINI_STREAM', '0') == '1'
+# 流式接口两个数据块之间最多等待的秒数
+STREAM_READ_TIMEOUT = float(os.getenv('GEMINI_STREAM_TIMEOUT', '30'))
+# 所有批次共用一个连接池；限流和网络错误由 classify_with_gemini 自己按 limiter 重试
+GEMINI_HTTP = HttpClient('gemini', timeouts={'generate': 60, 'stream': STREAM_READ_TIMEOUT}, retries=0)
+# 并发请求数和每分钟配额（默认按免费档 gemini-2.0-flash）
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '4'))
+GEMINI_RPM = int(os.getenv('GEMINI_RPM', '15'))
+GEMINI_TPM = int(os.getenv('GEMINI_TPM', '1000000'))
+# 单个批次最多请求几次（限流、网络错误时重试）
+MAX_ATTEMPTS = 5
+# 单条 prompt 在一次运行中最多重新排队几次（回复里漏掉它、或单独一条也失败）
+MAX_ITEM_RETRIES = 2
+# 连续这么多批请求失败、中间没有任何成功时，认为 API 整体不可用，不再发新批次
+MAX_CONSECUTIVE_FAILURES = 5
+MAX_OUTPUT_TOKENS = 4096
+# 每条 prompt 最多发送的字符数
+PROMPT_CHARS = 200
 
 
 SYSTEM_PROMPT = """你是一个AI视频内容分类专家。请为以下 Seedance AI 视频生成的 prompt 进行分析。
@@ -49,129 +95,436 @@ SYSTEM_PROMPT = """你是一个AI视频内容分类专家。请为以下 Seedanc
 ]"""
 
 
-def classify_with_gemini(prompts_batch):
-    """调用 Gemini REST API 批量分类 prompt"""
-    prompt_list = ""
-    for i, p in enumerate(prompts_batch):
-        text = p["prompt"][:200]  # 截断过长的 prompt
-        prompt_list += f'{i+1}. """{text}"""\n'
+def open_classify_cache():
+    """当前模型和 SYSTEM_PROMPT 对应的分类缓存"""
+    return ClassifyCache(GEMINI_MODEL, SYSTEM_PROMPT)
+
+
+def apply_classification(p, result):
+    p.pop('tag_source', None)
+    p['tags'] = result.get('tags', [])
+    p['quality_score'] = result.get('quality_score', 0)
+    p['summary'] = result.get('summary', '')
+
 
+def format_prompt_item(i, p):
+    return f'{i+1}. """{p["prompt"][:PROMPT_CHARS]}"""\n'
+
+
+def build_request_text(prompts_batch):
+    prompt_list = "".join(format_prompt_item(i, p) for i, p in enumerate(prompts_batch))
     user_prompt = f"请分类以下 {len(prompts_batch)} 条 prompt：\n\n{prompt_list}"
+    return SYSTEM_PROMPT + "\n\n" + user_prompt
+
+
+# 组批时每条之外的固定开销（SYSTEM_PROMPT 和说明行）
+REQUEST_OVERHEAD_CHARS = len(build_request_text([]))
+
+
+def item_chars(item):
+    """组批用：一条 (idx, p) 在请求里占用的字符数（序号按三位数估）"""
+    return len(format_prompt_item(999, item[1]))
+
+
+def result_id(r, batch_len):
+    """结果的 id 在批次范围内、且带 tags 时返回 id，否则返回 None"""
+    if not isinstance(r, dict) or not isinstance(r.get('tags'), list) or not r['tags']:
+        return None
+    rid = r.get('id')
+    if isinstance(rid, int) and 1 <= rid <= batch_len:
+        return rid
+    return None
+
+
+def retry_after_seconds(resp, attempt):
+    """从 Retry-After 头或错误详情中的 retryDelay 取等待时间，都没有时指数退避"""
+    header = resp.headers.get('Retry-After')
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    m = re.search(r'"retryDelay"\s*:\s*"(\d+(?:\.\d+)?)s"', resp.text or '')
+    if m:
+        return float(m.group(1))
+    return min(60.0, 2 ** attempt * 2) * random.uniform(0.8, 1.2)
+
+
+def read_stream(resp, parser, emit):
+    """读取 SSE 事件（data: {...}），解析出的元素逐个交给 emit；返回 (usageMetadata, finishReason)"""
+    usage, finish = None, None
+    for line in resp.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        event = json.loads(line[5:])
+        usage = event.get('usageMetadata', usage)
+        for candidate in event.get('candidates', [])[:1]:
+            finish = candidate.get('finishReason', finish)
+            for part in candidate.get('content', {}).get('parts', []):
+                for item in parser.feed(part.get('text', '')):
+                    emit(item)
+    return usage, finish
+
+
+def classify_with_gemini(prompts_batch, limiter=None, budget=None, on_item=None, stream=None):
+    """
+    调用 Gemini REST API 批量分类 prompt，限流时按 limiter 退避后重试，用量反馈给 budget。
+    每解析出一条结果就调用 on_item(result)（流式时边收边调用）。
+    返回解析出的结果列表（可能只有一部分，或为空）；请求没有成功时返回 None。
+    """
+    if stream is None:
+        stream = GEMINI_STREAM
+    request_text = build_request_text(prompts_batch)
 
     payload = {
         "contents": [
             {
                 "parts": [
-                    {"text": SYSTEM_PROMPT + "\n\n" + user_prompt}
+                    {"text": request_text}
                 ]
             }
         ],
         "generationConfig": {
             "temperature": 0.3,
-            "maxOutputTokens": 4096,
+            "maxOutputTokens": MAX_OUTPUT_TOKENS,
         }
     }
 
-    try:
-        resp = requests.post(
-            GEMINI_URL,
-            params={"key": GEMINI_API_KEY},
-            json=payload,
-            timeout=60
-        )
-        resp.raise_for_status()
-        data = resp.json()
-
-        # 提取文本
-        text = data['candidates'][0]['content']['parts'][0]['text']
-        text = text.strip()
-
-        # 去掉可能的 markdown code block
-        if text.startswith('```'):
-            text = text.split('\n', 1)[1]
-            text = text.rsplit('```', 1)[0]
-        text = text.strip()
-
-        results = json.loads(text)
-        return results
-
-    except requests.exceptions.HTTPError as e:
-        print(f"  ⚠️ HTTP 错误: {e}")
-        if resp.status_code == 429:
-            print("  ⏳ 触发限流，等待 30 秒...")
-            time.sleep(30)
-        return None
-    except (json.JSONDecodeError, KeyError, IndexError) as e:
-        print(f"  ⚠️ 解析响应失败: {e}")
-        return None
-    except Exception as e:
-        print(f"  ⚠️ API 调用失败: {e}")
-        return None
-
-
-def classify_prompts():
-    """对 prompt_library.json 中未分类的 prompt 进行分类"""
+    for attempt in range(MAX_ATTEMPTS):
+        if limiter is not None:
+            tokens = sum(budget.estimate(len(request_text), len(prompts_batch))) if budget else len(request_text) // 3
+            limiter.acquire(tokens)
+        received = []
+        parser = JsonArrayStream()
+
+        def emit(item):
+            received.append(item)
+            if on_item is not None:
+                on_item(item)
+
+        try:
+            if stream:
+                resp = GEMINI_HTTP.post(
+                    GEMINI_STREAM_URL,
+                    params={"key": GEMINI_API_KEY, "alt": "sse"},
+                    json=payload,
+                    endpoint='stream',
+                    stream=True
+                )
+            else:
+                resp = GEMINI_HTTP.post(
+                    GEMINI_URL,
+                    params={"key": GEMINI_API_KEY},
+                    json=payload,
+                    endpoint='generate'
+                )
+            # 流式响应不读完不会归还连接，任何出口都要关掉
+            with resp:
+                if resp.status_code in (429, 503):
+                    delay = retry_after_seconds(resp, attempt)
+                    print(f"  ⏳ 触发限流 (HTTP {resp.status_code})，{delay:.0f} 秒后重试...")
+                    if limiter is not None:
+                        limiter.backoff(delay)
+                    else:
+                        time.sleep(delay)
+                    continue
+                resp.raise_for_status()
+                if limiter is not None:
+                    limiter.success()
+
+                # ```json 围栏和截断由 JsonArrayStream 处理
+                if stream:
+                    resp.encoding = 'utf-8'
+                    usage, finish = read_stream(resp, parser, emit)
+                else:
+                    data = resp.json()
+                    candidate = data['candidates'][0]
+                    usage, finish = data.get('usageMetadata'), candidate.get('finishReason')
+                    for item in parser.feed(candidate['content']['parts'][0]['text']):
+                        emit(item)
+                for item in parser.close():
+                    emit(item)
+
+                truncated = finish == 'MAX_TOKENS'
+                if budget is not None:
+                    budget.observe(len(request_text), len(prompts_batch), usage, truncated)
+                if truncated:
+                    print(f"  ⚠️ 回复超出 maxOutputTokens 被截断（{len(prompts_batch)} 条），调小后续批次")
+                if parser.skipped:
+                    print(f"  ⚠️ 回复中 {parser.skipped} 个元素无法解析，已丢弃")
+                return received
+
+        except requests.exceptions.HTTPError as e:
+            print(f"  ⚠️ HTTP 错误: {e}")
+            return None
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            # 有响应但没有可用内容（例如被安全过滤），已收到的结果照常返回，其余交给拆分重试
+            print(f"  ⚠️ 解析响应失败: {e}")
+            return received
+        except requests.exceptions.RequestException as e:
+            if received:
+                # 流式中途断开：保留已收到的结果，剩下的由调用方重新排队
+                for item in parser.close():
+                    emit(item)
+                print(f"  ⚠️ 流式响应中断: {e}，已收到 {len(received)} 条")
+                return received
+            delay = min(60.0, 2 ** attempt * 2) * random.uniform(0.8, 1.2)
+            print(f"  ⚠️ API 调用失败: {e}，{delay:.0f} 秒后重试...")
+            time.sleep(delay)
+
+    print(f"  ⚠️ 重试 {MAX_ATTEMPTS} 次仍失败")
+    return None
+
+
+def classify_prompts(concurrency=GEMINI_CONCURRENCY, rpm=GEMINI_RPM, tpm=GEMINI_TPM, use_local=True,
+                     stream=GEMINI_STREAM):
+    """对 prompt_library.json 中未分类的 prompt 进行分类（concurrency 个批次同时请求）"""
     library_file = os.path.join(BASE_DIR, 'data', 'prompt_library.json')
 
-    if not GEMINI_API_KEY:
-        print("❌ GEMINI_API_KEY 未设置，请在 .env 文件中配置")
-        print("   跳过分类步骤，保留空标签")
-        return
-
-    if not os.path.exists(library_file):
-        print("❌ prompt_library.json 不存在，请先运行 extract_prompts.py")
-        return
-
-    with open(library_file, 'r', encoding='utf-8') as f:
-        library = json.load(f)
-
-    prompts = library['prompts']
-
-    # 找出未分类的 prompt
-    unclassified = [(i, p) for i, p in enumerate(prompts) if not p.get('tags')]
-    print(f"📊 总 prompt: {len(prompts)}, 待分类: {len(unclassified)}")
+    db = SqliteStore() if use_sqlite() else None
+    if db is not None:
+        # SQLite 后端：只读取未分类的行，逐行写回
+        unclassified = db.unclassified_prompts()
+        prompts = {key: p for key, p in unclassified}
+        total = db.prompt_count()
+    else:
+        if not os.path.exists(library_file):
+            print("❌ prompt_library.json 不存在，请先运行 extract_prompts.py")
+            return
+
+        with open(library_file, 'r', encoding='utf-8') as f:
+            library = json.load(f)
+
+        prompts = library['prompts']
+        total = len(prompts)
+
+        # 找出未分类的 prompt
+        unclassified = [(i, p) for i, p in enumerate(prompts) if not p.get('tags')]
+    print(f"📊 总 prompt: {total}, 待分类: {len(unclassified)}")
+
+    cache = open_classify_cache()
+    journal = ClassifyJournal()
+
+    def persist():
+        """素材库、缓存各写一次，然后清掉日志（中途失败时日志保留，下次回放）"""
+        if db is None:
+            library['prompts'] = prompts
+            tmp_file = library_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(library, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, library_file)
+        cache.save()
+        journal.clear()
+
+    # 上次中断留下的日志先并入缓存，下面和缓存命中一起写回
+    replayed = journal.load()
+    if replayed:
+        print(f"📒 回放分类日志: {len(replayed)} 条")
+        for r in replayed.values():
+            cache.put(r['prompt'], r)
+
+    # 先查分类缓存，命中的直接写回
+    pending = []
+    for idx, p in unclassified:
+        hit = cache.get(p['prompt'])
+        if hit is None:
+            pending.append((idx, p))
+            continue
+        apply_classification(prompts[idx], hit)
+        if db is not None:
+            db.update_classification(idx, prompts[idx])
+    cache_hits = len(unclassified) - len(pending)
+    if cache_hits:
+        print(f"🗃️  分类缓存命中: {cache_hits} 条")
+    unclassified = pending
+
+    # 本地预分类：置信度达到阈值的直接采用，其余交给 Gemini（预测结果留作兜底）
+    local_preds = {}
+
+    def apply_local(items):
+        for idx, p in items:
+            apply_classification(p, local_preds[idx])
+            p['tag_source'] = 'local'
+            if db is not None:
+                db.update_classification(idx, p)
+
+    local = None
+    if use_local and unclassified:
+        local = load_local_classifier(lambda: db.iter_prompts() if db is not None else prompts)
+    if local is not None:
+        preds = local.predict([p['prompt'] for _, p in unclassified])
+        local_preds = {idx: pred for (idx, _), pred in zip(unclassified, preds)}
+        confident = [item for item in unclassified if local_preds[item[0]]['confidence'] >= local.threshold]
+        apply_local(confident)
+        unclassified = [item for item in unclassified if not item[1].get('tags')]
+        print(f"🧮 本地预分类: {len(confident)} 条, 剩余 {len(unclassified)} 条")
+    else:
+        confident = []
+
+    if replayed or cache_hits or confident:
+        persist()
 
     if not unclassified:
         print("✅ 所有 prompt 已分类，无需处理")
         return
 
-    # 批量分类
-    total_batches = (len(unclassified) + BATCH_SIZE - 1) // BATCH_SIZE
-    classified_count = 0
-
-    for batch_idx in range(0, len(unclassified), BATCH_SIZE):
-        batch = unclassified[batch_idx:batch_idx + BATCH_SIZE]
-        batch_num = batch_idx // BATCH_SIZE + 1
-        print(f"\n🔄 批次 {batch_num}/{total_batches} ({len(batch)} 条)...")
-
-        batch_prompts = [p for _, p in batch]
-        results = classify_with_gemini(batch_prompts)
-
-        if results:
-            for result in results:
-                idx_in_batch = result['id'] - 1
-                if 0 <= idx_in_batch < len(batch):
-                    original_idx = batch[idx_in_batch][0]
-                    prompts[original_idx]['tags'] = result.get('tags', [])
-                    prompts[original_idx]['quality_score'] = result.get('quality_score', 0)
-                    prompts[original_idx]['summary'] = result.get('summary', '')
-                    classified_count += 1
-            print(f"  ✅ 成功分类 {len(results)} 条")
+    if not GEMINI_API_KEY:
+        print("❌ GEMINI_API_KEY 未设置，请在 .env 文件中配置")
+        if local_preds:
+            apply_local(unclassified)
+            persist()
+            print(f"   🧮 先用本地分类结果填充 {len(unclassified)} 条")
         else:
-            print(f"  ❌ 批次 {batch_num} 失败，跳过")
-
-        # 每批次后保存（防止中断丢数据）
-        library['prompts'] = prompts
-        with open(library_file, 'w', encoding='utf-8') as f:
-            json.dump(library, f, ensure_ascii=False, indent=2)
-
-        # 避免 API 限流
-        if batch_idx + BATCH_SIZE < len(unclassified):
-            time.sleep(3)
+            print("   跳过分类步骤，保留空标签")
+        return
 
+    # 批量分类：批次并发请求，工作线程把解析出的每条结果放进 events，由主线程写回
+    # （流式时边收边写）。批次在发出前才按当前的 token 预算组，已返回的用量会影响后面的批次大小
+    queue = deque(unclassified)
+    # 重试的批次（回复漏掉的剩余部分、失败批次拆开的两半）优先于新组的批次
+    retry_batches = deque()
+    retries = {}
+    budget = TokenBudget(MAX_OUTPUT_TOKENS)
+    classified_count = 0
+    dropped_count = 0
+    batch_count = 0
+    failed_streak = 0
+    limiter = RateLimiter(rpm, tpm)
+    events = Queue()
+    batches = {}
+    found = {}
+    print(f"⚙️  并发 {concurrency}, 限额 {rpm} RPM / {tpm} TPM{', 流式' if stream else ''}")
+    print(f"📐 批次预算: 每批最多 {budget.max_items()} 条, 输入 {budget.input_budget} token")
+
+    def requeue(items):
+        """漏掉的条目重新排队，超过重试次数的跳过"""
+        nonlocal dropped_count
+        keep = []
+        for item in items:
+            retries[item[0]] = retries.get(item[0], 0) + 1
+            if retries[item[0]] > MAX_ITEM_RETRIES:
+                dropped_count += 1
+            else:
+                keep.append(item)
+        if keep:
+            retry_batches.append(keep)
+
+    def drain_events():
+        """写回已收到的结果；日志每次追加一批（防止中断丢数据），素材库和缓存最后统一写"""
+        nonlocal classified_count
+        records = []
+        while True:
+            try:
+                batch_num, result = events.get_nowait()
+            except Empty:
+                break
+            batch = batches[batch_num]
+            rid = result_id(result, len(batch))
+            if rid is None or rid in found[batch_num]:
+                continue
+            found[batch_num][rid] = result
+            original_idx = batch[rid - 1][0]
+            p = prompts[original_idx]
+            apply_classification(p, result)
+            cache.put(p['prompt'], p)
+            records.append({'prompt': p['prompt'], 'tags': p['tags'],
+                            'quality_score': p['quality_score'], 'summary': p['summary']})
+            if db is not None:
+                db.update_classification(original_idx, p)
+            classified_count += 1
+        journal.append_many(records)
+
+    concurrency = max(1, concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        running = {}
+
+        def submit_next():
+            nonlocal batch_count
+            if retry_batches:
+                batch = retry_batches.popleft()
+            else:
+                batch = budget.take_batch(queue, REQUEST_OVERHEAD_CHARS, item_chars)
+            batch_count += 1
+            batches[batch_count] = batch
+            found[batch_count] = {}
+            on_item = lambda r, num=batch_count: events.put((num, r))
+            future = pool.submit(classify_with_gemini, [p for _, p in batch], limiter, budget, on_item, stream)
+            running[future] = batch_count
+
+        def can_submit():
+            return (retry_batches or queue) and len(running) < concurrency \
+                and failed_streak < MAX_CONSECUTIVE_FAILURES
+
+        while can_submit():
+            submit_next()
+        while running:
+            done, _ = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+            drain_events()
+            for future in done:
+                batch_num = running.pop(future)
+                batch = batches.pop(batch_num)
+                batch_found = found.pop(batch_num)
+                results = future.result()
+                print(f"\n🔄 批次 {batch_num} ({len(batch)} 条, 剩余 {len(queue)} 条)...")
+
+                # results 为 None 是请求本身失败（例如某条 prompt 导致 HTTP 400），和空回复一样拆开重试
+                failed_streak = failed_streak + 1 if results is None and not batch_found else 0
+                missing = [item for i, item in enumerate(batch, 1) if i not in batch_found]
+                if results is None:
+                    print(f"  ❌ 批次 {batch_num} 请求失败")
+                if not missing:
+                    print(f"  ✅ 成功分类 {len(batch_found)} 条")
+                elif batch_found or len(missing) == 1:
+                    print(f"  ⚠️ 分类 {len(batch_found)} 条，{len(missing)} 条重新排队")
+                    requeue(missing)
+                else:
+                    # 整批没有结果：对半拆开重试，定位出问题的 prompt
+                    print(f"  ⚠️ 没有可用结果，拆成 {len(missing) // 2} + {len(missing) - len(missing) // 2} 条重试")
+                    half = len(missing) // 2
+                    retry_batches.append(missing[:half])
+                    retry_batches.append(missing[half:])
+            while can_submit():
+                submit_next()
+
+    if failed_streak >= MAX_CONSECUTIVE_FAILURES:
+        left = len(queue) + sum(len(b) for b in retry_batches)
+        print(f"\n❌ 连续 {failed_streak} 批请求失败，API 可能不可用，剩余 {left} 条留到下次")
+
+    # Gemini 没有分出来的（API 不可用、多次重试失败），用本地结果兜底
+    leftover = [item for item in unclassified if not item[1].get('tags') and item[0] in local_preds]
+    if leftover:
+        apply_local(leftover)
+        print(f"\n🧮 {len(leftover)} 条未能由 Gemini 分类，先用本地分类结果填充")
+
+    persist()
+    budget.save()
+    if limiter.throttled:
+        print(f"\n⏳ 共触发限流 {limiter.throttled} 次")
+    print(f"📐 共 {batch_count} 批，平均每批 {len(unclassified) / max(1, batch_count):.1f} 条"
+          f"{f'，截断 {budget.truncated} 次' if budget.truncated else ''}")
+    if dropped_count:
+        print(f"⚠️ {dropped_count} 条多次重试仍未分类，留到下次")
     print(f"\n✅ 分类完成: {classified_count}/{len(unclassified)} 条")
-    print(f"📁 已更新: {library_file}")
+    GEMINI_HTTP.print_stats()
+    if db is not None:
+        db.close()
+        print(f"📁 已更新: {db.root}")
+    else:
+        print(f"📁 已更新: {library_file}")
 
 
 if __name__ == '__main__':
-    classify_prompts()
+    import argparse
+    parser = argparse.ArgumentParser(description='Classify unclassified prompts with Gemini')
+    parser.add_argument('--concurrency', type=int, default=GEMINI_CONCURRENCY, help='Batches in flight at once')
+    parser.add_argument('--rpm', type=int, default=GEMINI_RPM, help='Requests-per-minute quota')
+    parser.add_argument('--tpm', type=int, default=GEMINI_TPM, help='Tokens-per-minute quota')
+    parser.add_argument('--no-local', action='store_true', help='Skip the local pre-classifier')
+    parser.add_argument('--stream', action='store_true', default=GEMINI_STREAM,
+                        help='Use the streaming endpoint and apply results as they arrive')
+    args = parser.parse_args()
+    classify_prompts(concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm, use_local=not args.no_local,
+                     stream=args.stream)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+把已结束月份的 data/raw 每日快照压实为一个按月分段 data/raw/YYYY-MM.jsonl.gz。
+
+- 分段内按 tweet id 去重（与 merge_dedup 一样先到先得）
+- data/raw_segments.json 记录每个分段的日期范围和 tweet id 范围，
+  raw_io.select_raw_files 据此跳过不可能包含目标日期或新 id 的分段（merge_dedup --since/--until）
+- 源文件都已被 merge_dedup 处理过时，把新分段直接登记到 raw_manifest，
+  下次合并不会为它再解析一遍
+
+这样无论项目运行多久，每次需要打开的 raw 文件数都不超过「月份数 + 当月天数」。
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+
+from raw_io import (RAW_DIR, SEGMENT_INDEX_FILE, DAILY_STEM, id_order, list_raw_files, load_segment_index,
+                    read_raw, split_raw_name, write_raw)
+from tweet_store import tweet_key, created_ts
+from merge_dedup import BASE_DIR, file_sha256, load_manifest, save_manifest
+
+
+def save_segment_index(index, index_file=SEGMENT_INDEX_FILE):
+    tmp_file = index_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_file, index_file)
+
+
+def describe_segment(tweets):
+    """计算分段的日期范围和 id 范围"""
+    dates = []
+    for t in tweets:
+        ts = created_ts(t.get('createdAt', ''))
+        if ts:
+            dates.append(datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d'))
+    ids = sorted((tweet_key(t) for t in tweets if tweet_key(t)), key=id_order)
+    return {
+        'date_min': min(dates) if dates else '',
+        'date_max': max(dates) if dates else '',
+        'id_min': ids[0] if ids else '',
+        'id_max': ids[-1] if ids else '',
+        'count': len(tweets),
+    }
+
+
+def closed_months(raw_files, current_month):
+    """按月份分组每日快照，只返回早于当前月份的"""
+    months = {}
+    for path in raw_files:
+        stem, _ = split_raw_name(path)
+        m = DAILY_STEM.match(stem)
+        if m and m.group(1) < current_month:
+            months.setdefault(m.group(1), []).append(path)
+    return months
+
+
+def compact_raw(before_month=None, raw_dir=RAW_DIR):
+    """压实 before_month（YYYY-MM，默认当前 UTC 月份）之前的所有每日快照"""
+    current_month = before_month or datetime.now(timezone.utc).strftime('%Y-%m')
+    raw_files = list_raw_files(raw_dir)
+    months = closed_months(raw_files, current_month)
+    if not months:
+        print("✅ 没有需要压实的月份")
+        return
+
+    index = load_segment_index()
+    manifest = load_manifest()
+
+    for month, daily_files in sorted(months.items()):
+        # 已有的月分段排在最前，保持先到先得
+        sources = [p for p in raw_files if split_raw_name(p)[0] == month] + daily_files
+        seen = set()
+        tweets = []
+        for path in sources:
+            for tweet in read_raw(path):
+                tid = tweet_key(tweet)
+                if tid and tid not in seen:
+                    seen.add(tid)
+                    tweets.append(tweet)
+
+        rels = [os.path.relpath(p, BASE_DIR) for p in sources]
+        all_merged = all(
+            rel in manifest and manifest[rel].get('sha256') == file_sha256(p)
+            for rel, p in zip(rels, sources)
+        )
+
+        seg_path = write_raw(month, tweets, raw_dir)
+        for path in daily_files:
+            os.remove(path)
+
+        seg_name = os.path.basename(seg_path)
+        index = {k: v for k, v in index.items() if split_raw_name(k)[0] != month}
+        index[seg_name] = describe_segment(tweets)
+
+        for rel in rels:
+            manifest.pop(rel, None)
+        if all_merged:
+            st = os.stat(seg_path)
+            manifest[os.path.relpath(seg_path, BASE_DIR)] = {
+                'size': st.st_size,
+                'mtime': st.st_mtime,
+                'sha256': file_sha256(seg_path),
+                'count': len(tweets),
+            }
+
+        print(f"  📦 {month}: {len(daily_files)} 个每日快照 → {seg_name} ({len(tweets)} 条)")
+
+    save_segment_index(index)
+    save_manifest(manifest)
+    print(f"✅ 压实完成: 剩余 {len(list_raw_files(raw_dir))} 个 raw 文件")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Compact closed months of daily raw snapshots')
+    parser.add_argument('--before', help='Compact months before YYYY-MM (default: current UTC month)')
+    args = parser.parse_args()
+    compact_raw(before_month=args.before)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+按 tweet id 缓存的 prompt 提取结果 data/extract_cache.jsonl。
+
+Grok / 新闻转述 / 视频 / prompt 提取只依赖推文正文和媒体，推文入库后不会再变，
+所以每条推文只需要判断一次。第一行记录提取规则的版本哈希，规则变了整个缓存作废重建。
+黑名单和互动数据不进缓存，每次运行时分别从 blacklist.txt 和推文存储读取。
+"""
+
+import os
+import json
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.path.join(BASE_DIR, 'data', 'extract_cache.jsonl')
+
+
+class ExtractCache:
+    """tid → {'status', 'url', 'prompt', 'thumbnail'}，新结果追加写入"""
+
+    def __init__(self, version, cache_file=CACHE_FILE):
+        self.version = version
+        self.cache_file = cache_file
+        self.entries = {}
+        self.pending = []
+        # 文件不存在或版本不符时整体重写
+        self.rewrite = True
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            try:
+                if json.loads(header).get('version') != self.version:
+                    print("♻️  提取规则已变更，缓存作废")
+                    return
+            except (json.JSONDecodeError, AttributeError):
+                return
+            clean = True
+            for line in f:
+                # 中断时可能留下半行：忽略它，并在下次写入时整体重写
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    clean = False
+                    continue
+                self.entries[entry.pop('id')] = entry
+        self.rewrite = not clean
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, tid):
+        return self.entries.get(tid)
+
+    def items(self):
+        return self.entries.items()
+
+    def put(self, tid, entry):
+        self.entries[tid] = entry
+        self.pending.append(tid)
+
+    def _line(self, tid):
+        return json.dumps(dict(id=tid, **self.entries[tid]), ensure_ascii=False) + '\n'
+
+    def flush(self):
+        """写入本次新增的结果，返回写入条数"""
+        if self.rewrite:
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'version': self.version}) + '\n')
+                for tid in self.entries:
+                    f.write(self._line(tid))
+            os.replace(tmp_file, self.cache_file)
+            self.rewrite = False
+        elif self.pending:
+            with open(self.cache_file, 'a', encoding='utf-8') as f:
+                for tid in self.pending:
+                    f.write(self._line(tid))
+        written = len(self.pending)
+        self.pending = []
+        return written
@@ -1,91 +1,83 @@
 #!/usr/bin/env python3
 """
-从 all_tweets.json 中提取包含完整 prompt + 视频的推文，
+从推文存储 data/tweets/（或指定的 all_tweets.json）中提取包含完整 prompt + 视频的推文，
 生成 prompt_library.json。
 
 筛选逻辑：
 1. 推文包含明确的 prompt 文本
 2. 推文附带视频内容
-3. 排除 Grok 自动回复、新闻转述
-4. 去重：相同 prompt 保留互动量最高的
+3. 排除指定作者（Grok 自动回复等）、新闻转述、垃圾推文，规则见 data/filter_rules.json（rule_engine.py）
+4. 去重：相同或近似重复（MinHash/LSH，见 near_dedup.py）的 prompt 保留互动量最高的
+
+1-3 的判断结果按 tweet id 缓存在 data/extract_cache.jsonl（见 extract_cache.py），
+每次只评估新推文；提取规则变更时缓存自动作废，--no-cache 强制全部重新评估。
 """
 
 import os
 import json
 import re
-from collections import defaultdict
+import hashlib
+import inspect
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlite_store import SqliteStore, open_tweet_store, prompt_hash, use_sqlite
+from tweet_store import tweet_key
+from extract_cache import ExtractCache
+from near_dedup import canonical_text, cluster_near_duplicates
+from rule_engine import load_rules
+from media_info import describe_media, get_media_info, media_context, media_version
+from blacklist import load_blacklist
+from classify_prompts import open_classify_cache
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 多进程模式下每个任务评估的推文数
+EXTRACT_CHUNK = 1000
 
 
-def has_video(tweet):
-    """检查推文是否附带视频"""
-    media = tweet.get('media', [])
-    if isinstance(media, list):
-        for m in media:
-            if isinstance(m, str):
-                if 'video_thumb' in m or 'amplify_video' in m or 'ext_tw_video' in m:
-                    return True
-            elif isinstance(m, dict):
-                if m.get('type') == 'video' or 'video' in str(m.get('url', '')):
-                    return True
-    # 检查正文中的链接
-    text = tweet.get('text', '')
-    if re.search(r'https://t\.co/\w+', text):
-        return True
-    return False
-
-
-def get_video_thumbnail(tweet):
-    """获取视频缩略图 URL"""
-    media = tweet.get('media', [])
-    # First pass: look for explicit video thumbnails
-    if isinstance(media, list):
-        for m in media:
-            if isinstance(m, str) and ('video_thumb' in m or 'amplify_video' in m or 'ext_tw_video' in m):
-                return m
-            elif isinstance(m, dict):
-                return m.get('thumbnail', m.get('url', ''))
-    
-    # Second pass: fallback to any image (Twitter often uses standard media URLs for video posters)
-    if isinstance(media, list):
-        for m in media:
-            if isinstance(m, str) and m.startswith('http'):
-                return m
-    
-    return ''
+# 预编译的提取规则，避免每条推文都经过 re 模块的缓存查找
+PROMPT_PATTERNS = [
+    re.compile(r'[Pp][Rr][Oo][Mm][Pp][Tt]\s*(?:\(.*?\))?\s*[:：]\s*["""\'](.+?)["""\']', re.DOTALL | re.IGNORECASE),
+    re.compile(r'[Pp][Rr][Oo][Mm][Pp][Tt]\s*(?:\(.*?\))?\s*[:：]\s*(.+?)(?:\n\n|https://|$)', re.DOTALL | re.IGNORECASE),
+    re.compile(r'PROMPT\s*[:：]\s*["""\'](.+?)["""\']', re.DOTALL | re.IGNORECASE),
+]
+HASHTAG_TAIL_RE = re.compile(r'\s*#\w+.*$', re.DOTALL)
+TCO_TAIL_RE = re.compile(r'\s*https://t\.co/\S+')
+ASCII_QUOTED_RE = re.compile(r'"([^"]{15,})"')
+CURLY_QUOTED_RE = re.compile(r'\u201c([^\u201d]{15,})\u201d')
+JSON_BLOCK_RE = re.compile(r'\{[\s\S]+\}')
+STRUCT_BLOCK_RE = re.compile(r'(【.+)', re.DOTALL)
 
 
 def extract_prompt_text(text):
-    """从推文全文中提取 prompt 内容"""
+    """
+    从推文全文中提取 prompt 内容。
+    只做一次归一化（替换双引号、转小写），再用廉价的子串判断跳过不可能命中的规则。
+    输出与逐条 re.search 的旧实现完全一致，见 scripts/bench_extract.py。
+    """
     if not text:
         return None
 
     text_clean = text.replace('""', '"')
+    text_lower = text_clean.lower()
 
-    # Pattern 1: Prompt: "xxx" 或 Prompt: xxx
-    prompt_patterns = [
-        r'[Pp][Rr][Oo][Mm][Pp][Tt]\s*(?:\(.*?\))?\s*[:：]\s*["""\'](.+?)["""\']',
-        r'[Pp][Rr][Oo][Mm][Pp][Tt]\s*(?:\(.*?\))?\s*[:：]\s*(.+?)(?:\n\n|https://|$)',
-        r'PROMPT\s*[:：]\s*["""\'](.+?)["""\']',
-    ]
-
-    for pattern in prompt_patterns:
-        match = re.search(pattern, text_clean, re.DOTALL | re.IGNORECASE)
-        if match:
-            prompt = match.group(1).strip()
-            prompt = re.sub(r'\s*#\w+.*$', '', prompt, flags=re.DOTALL)
-            prompt = re.sub(r'\s*https://t\.co/\S+', '', prompt)
-            prompt = prompt.strip().strip('"').strip("'").strip('\u201c').strip('\u201d')
-            if len(prompt) > 10:
-                return prompt
+    # Pattern 1: Prompt: "xxx" 或 Prompt: xxx（三条规则都要求出现 prompt）
+    if 'prompt' in text_lower:
+        for pattern in PROMPT_PATTERNS:
+            match = pattern.search(text_clean)
+            if match:
+                prompt = match.group(1).strip()
+                prompt = HASHTAG_TAIL_RE.sub('', prompt)
+                prompt = TCO_TAIL_RE.sub('', prompt)
+                prompt = prompt.strip().strip('"').strip("'").strip('\u201c').strip('\u201d')
+                if len(prompt) > 10:
+                    return prompt
 
     # Pattern 2: 引号包裹的内容
-    text_lower = text_clean.lower()
     if 'seedance' in text_lower:
-        quoted = re.findall(r'"([^"]{15,})"', text_clean)
-        if not quoted:
-            quoted = re.findall(r'\u201c([^\u201d]{15,})\u201d', text_clean)
+        quoted = ASCII_QUOTED_RE.findall(text_clean) if '"' in text_clean else None
+        if not quoted and '\u201c' in text_clean:
+            quoted = CURLY_QUOTED_RE.findall(text_clean)
         if quoted:
             longest = max(quoted, key=len)
             if len(longest) > 15:
@@ -93,45 +85,23 @@ def extract_prompt_text(text):
 
     # Pattern 3: JSON 格式
     if '{' in text_clean and 'title' in text_lower:
-        json_match = re.search(r'\{[\s\S]+\}', text_clean)
+        json_match = JSON_BLOCK_RE.search(text_clean)
         if json_match and len(json_match.group(0)) > 50:
             return json_match.group(0).strip()
 
     # Pattern 4: 中文结构化 prompt
     if '【' in text_clean and ('prompt' in text_lower or '文生视频' in text_clean):
-        struct_match = re.search(r'(【.+)', text_clean, re.DOTALL)
+        struct_match = STRUCT_BLOCK_RE.search(text_clean)
         if struct_match:
             prompt = struct_match.group(1).strip()
-            prompt = re.sub(r'\s*#\w+.*$', '', prompt, flags=re.DOTALL)
-            prompt = re.sub(r'\s*https://t\.co/\S+', '', prompt)
+            prompt = HASHTAG_TAIL_RE.sub('', prompt)
+            prompt = TCO_TAIL_RE.sub('', prompt)
             if len(prompt) > 20:
                 return prompt.strip()
 
     return None
 
 
-def is_grok_response(tweet):
-    """检查是否为 Grok 自动回复"""
-    author = tweet.get('author', {})
-    if isinstance(author, dict):
-        return author.get('userName', '').lower() == 'grok'
-    return False
-
-
-def is_news_repost(text):
-    """检查是否为新闻转述"""
-    if not text:
-        return False
-    indicators = [
-        'Chinese company ByteDance released',
-        'Someone tested the new version',
-        'It is impossible to distinguish',
-        'just 48 hours ago',
-        'Lu Huang, an AI consultant',
-    ]
-    return sum(1 for ind in indicators if ind.lower() in text.lower()) >= 2
-
-
 def get_engagement(tweet):
     """计算互动分数"""
     likes = int(tweet.get('likeCount', 0) or 0)
@@ -142,88 +112,216 @@ def get_engagement(tweet):
     return likes + rts * 2 + replies * 0.5 + quotes * 1.5 + bookmarks
 
 
-def normalize_prompt(prompt):
-    """归一化 prompt 用于去重"""
-    if not prompt:
-        return ''
-    norm = prompt.lower().strip()
-    norm = re.sub(r'[^\w\s]', '', norm)
-    norm = re.sub(r'\s+', ' ', norm)
-    return norm[:100]
-
-
-def extract_prompts(input_file=None):
-    """主流程：从全量推文中提取 prompt 素材"""
-    if input_file is None:
-        input_file = os.path.join(BASE_DIR, 'data', 'all_tweets.json')
-
+def evaluate_tweet(tweet, rules=None, media_ctx=None):
+    """
+    对单条推文做与黑名单、互动数据无关的判断，结果可以按 tweet id 缓存。
+    status: author / news / spam / no_video / no_prompt / ok，rules 为命中的规则 id
+    批量调用时由调用方传入一次性加载好的 rules 和 media_ctx
+    """
+    entry = {'status': 'ok', 'url': tweet.get('url', '')}
+    text = tweet.get('text', '')
+    if rules is None:
+        rules = load_rules()
+    matched = rules.scan(tweet)
+    groups = rules.triggered(matched)
+    if matched:
+        entry['rules'] = matched
+    if 'author' in groups:
+        entry['status'] = 'author'
+    elif 'news' in groups:
+        entry['status'] = 'news'
+    elif 'spam' in groups:
+        entry['status'] = 'spam'
+    else:
+        # 采集时已算好的媒体描述符，旧数据缺失时现算
+        media = get_media_info(tweet, media_ctx)
+        prompt = extract_prompt_text(text) if media['has_video'] else None
+        if not media['has_video']:
+            entry['status'] = 'no_video'
+        elif not prompt:
+            entry['status'] = 'no_prompt'
+        else:
+            entry['prompt'] = prompt
+            entry['thumbnail'] = media['thumbnail']
+    return entry
+
+
+# 这些函数、正则和规则文件决定 evaluate_tweet 的结果，任何一处改动都会让提取缓存失效
+RULE_FUNCTIONS = (evaluate_tweet, describe_media, extract_prompt_text)
+RULE_REGEXES = tuple(PROMPT_PATTERNS) + (HASHTAG_TAIL_RE, TCO_TAIL_RE, ASCII_QUOTED_RE,
+                                         CURLY_QUOTED_RE, JSON_BLOCK_RE, STRUCT_BLOCK_RE)
+
+
+def extractor_version():
+    """提取规则的版本哈希：规则函数源码 + 正则 + filter_rules.json + media_info 版本"""
+    h = hashlib.sha1(f'{load_rules().fingerprint}\x00{media_version()}'.encode('utf-8'))
+    for fn in RULE_FUNCTIONS:
+        h.update(inspect.getsource(fn).encode('utf-8'))
+    for rx in RULE_REGEXES:
+        h.update(f'{rx.pattern}\x00{rx.flags}\x00'.encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+def _evaluate_chunk(tweets):
+    rules = load_rules()
+    media_ctx = media_context(rules)
+    return [evaluate_tweet(t, rules, media_ctx) for t in tweets]
+
+
+def _evaluate_window(pool, batch, lookup):
+    """一个窗口内：缓存命中的直接复用，其余分块交给进程池，再按原顺序拼回"""
+    entries = [lookup(t) for t in batch]
+    todo = [t for t, e in zip(batch, entries) if e is None]
+    chunks = [todo[i:i + EXTRACT_CHUNK] for i in range(0, len(todo), EXTRACT_CHUNK)]
+    fresh = iter([e for result in pool.map(_evaluate_chunk, chunks) for e in result])
+    for tweet, entry in zip(batch, entries):
+        if entry is None:
+            yield tweet, next(fresh), False
+        else:
+            yield tweet, entry, True
+
+
+def iter_evaluated(tweets, cache=None, workers=1):
+    """
+    按输入顺序产出 (tweet, 判断结果, 是否来自缓存)。
+    workers > 1 时未缓存的推文分块在进程池中评估，结果仍按输入顺序归并，
+    后续分组去重看到的顺序与单进程完全一致，输出逐字节相同。
+    """
+    def lookup(tweet):
+        tid = tweet_key(tweet)
+        return cache.get(tid) if cache is not None and tid else None
+
+    if workers <= 1:
+        rules = load_rules()
+        media_ctx = media_context(rules)
+        for tweet in tweets:
+            entry = lookup(tweet)
+            if entry is None:
+                yield tweet, evaluate_tweet(tweet, rules, media_ctx), False
+            else:
+                yield tweet, entry, True
+        return
+
+    # 分窗口提交，避免推文在主进程中堆积
+    window = workers * 2 * EXTRACT_CHUNK
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for tweet in tweets:
+            batch.append(tweet)
+            if len(batch) >= window:
+                yield from _evaluate_window(pool, batch, lookup)
+                batch = []
+        if batch:
+            yield from _evaluate_window(pool, batch, lookup)
+
+
+def extract_prompts(input_file=None, use_cache=True, workers=1, near_dup_threshold=None):
+    """
+    主流程：从全量推文中提取 prompt 素材（默认流式读取推文存储）。
+    use_cache 时按 tweet id 复用 data/extract_cache.jsonl 中的判断结果，只评估新推文；
+    缓存中已判定不合格的推文连读取都跳过。
+    workers > 1（0 = 全部核心）时用多进程评估，适合规则变更后的全量重跑。
+    near_dup_threshold 为近似去重的相似度阈值，默认 NEAR_DUP_THRESHOLD 环境变量或 0.8。
+    """
     output_file = os.path.join(BASE_DIR, 'data', 'prompt_library.json')
 
-    with open(input_file, 'r', encoding='utf-8') as f:
-        tweets = json.load(f)
+    cache = ExtractCache(extractor_version()) if use_cache else None
+    rejected = set()
+    if cache is not None:
+        rejected = {tid for tid, e in cache.items() if e['status'] != 'ok'}
+        print(f"🗃️  提取缓存: {len(cache)} 条 (其中不合格 {len(rejected)} 条)")
 
-    print(f"📊 总推文数: {len(tweets)}")
+    if input_file is None:
+        store = open_tweet_store()
+        total_tweets = len(store)
+        # 缓存里可能有已不在存储中的推文（重建存储、被黑名单拦下），只统计这次实际会遇到的
+        if rejected:
+            rejected &= store.ids()
+        tweets = store.iter_sorted(skip_ids=rejected)
+    else:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            tweets = json.load(f)
+        total_tweets = len(tweets)
+        rejected &= {tweet_key(t) for t in tweets}
+        tweets = [t for t in tweets if tweet_key(t) not in rejected]
+
+    print(f"📊 总推文数: {total_tweets}")
 
     results = []
-    stats = {'grok': 0, 'news': 0, 'no_video': 0, 'no_prompt': 0, 'blacklisted': 0}
-
-    # 加载黑名单
-    blacklist_file = os.path.join(BASE_DIR, 'data', 'blacklist.txt')
-    blacklist = set()
-    if os.path.exists(blacklist_file):
-        with open(blacklist_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                url = line.strip()
-                if url and not url.startswith('#'):
-                    blacklist.add(url)
+    stats = {'author': 0, 'news': 0, 'spam': 0, 'no_video': 0, 'no_prompt': 0, 'blacklisted': 0}
+    rule_hits = Counter()
+
+    # 加载黑名单（merge 时已过滤，这里拦截加入黑名单前就已入库的推文）
+    blacklist = load_blacklist()
+    if len(blacklist):
         print(f"🚫 加载黑名单: {len(blacklist)} 条")
 
     # Load existing library to preserve classifications
-    existing_map = {}
-    if os.path.exists(output_file):
+    # 依次尝试：旧素材库中完整归一化文本相同的条目 → 分类缓存
+    # （不再按前 100 字符匹配：开头相同的不同 prompt 会互相继承标签）
+    # （本地预分类的结果不保留，classify_prompts 会重新预测或交给 Gemini）
+    db = SqliteStore() if use_sqlite() else None
+    classify_cache = open_classify_cache()
+    existing_full = {}
+    old_prompts = []
+    if db is not None:
+        old_prompts = db.iter_prompts()
+    elif os.path.exists(output_file):
         try:
             with open(output_file, 'r', encoding='utf-8') as f:
-                old_lib = json.load(f)
-                for p in old_lib.get('prompts', []):
-                    norm = normalize_prompt(p.get('prompt', ''))
-                    if norm:
-                        existing_map[norm] = p
-            print(f"📥 加载已有分类数据: {len(existing_map)} 条")
+                old_prompts = json.load(f).get('prompts', [])
         except Exception as e:
             print(f"⚠️ 读取旧数据失败: {e}")
+    for p in old_prompts:
+        key = canonical_text(p.get('prompt', ''))
+        if key and p.get('tags') and p.get('tag_source') != 'local':
+            existing_full[key] = p
+            # 分类缓存建立之前的分类结果也收进缓存
+            classify_cache.put(p['prompt'], p)
+    if existing_full:
+        print(f"📥 加载已有分类数据: {len(existing_full)} 条")
+    classify_cache.save()
+
+    # 缓存中已判定不合格的推文只需要计数（黑名单优先，与逐条判断时一致）
+    for tid in rejected:
+        entry = cache.get(tid)
+        rule_hits.update(entry.get('rules', ()))
+        if tid in blacklist or entry['url'] in blacklist:
+            stats['blacklisted'] += 1
+        else:
+            stats[entry['status']] += 1
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if workers > 1:
+        print(f"  ⚙️  并行评估: {workers} 个进程")
 
-    for tweet in tweets:
+    evaluated = 0
+    for tweet, entry, cached in iter_evaluated(tweets, cache, workers):
         text = tweet.get('text', '')
-        url = tweet.get('url', '') # Use 'url' field for consistency with blacklist
+
+        if not cached:
+            evaluated += 1
+            tid = tweet_key(tweet)
+            if cache is not None and tid:
+                cache.put(tid, entry)
+        rule_hits.update(entry.get('rules', ()))
 
         # 过滤黑名单
-        if url and url in blacklist:
+        if blacklist.is_blocked(tweet):
             stats['blacklisted'] += 1
             continue
 
-        if is_grok_response(tweet):
-            stats['grok'] += 1
-            continue
-
-        if is_news_repost(text):
-            stats['news'] += 1
-            continue
-
-        if not has_video(tweet):
-            stats['no_video'] += 1
-            continue
-
-        prompt = extract_prompt_text(text)
-        if not prompt:
-            stats['no_prompt'] += 1
+        if entry['status'] != 'ok':
+            stats[entry['status']] += 1
             continue
 
+        prompt = entry['prompt']
         author = tweet.get('author', {})
         engagement = get_engagement(tweet)
 
         # 检查是否已有分类数据
-        norm_prompt = normalize_prompt(prompt)
-        existing_data = existing_map.get(norm_prompt, {})
+        existing_data = existing_full.get(canonical_text(prompt)) or classify_cache.get(prompt) or {}
         
         results.append({
             'prompt': prompt,
@@ -239,7 +337,7 @@ def extract_prompts(input_file=None):
             'replies': int(tweet.get('replyCount', 0) or 0),
             'bookmarks': int(tweet.get('bookmarkCount', 0) or 0),
             'engagement_score': engagement,
-            'video_thumbnail': get_video_thumbnail(tweet),
+            'video_thumbnail': entry['thumbnail'],
             'full_text_preview': (text[:200] + '...') if len(text) > 200 else text,
             # 保留已有分类，或初始化为空
             'tags': existing_data.get('tags', []),
@@ -247,43 +345,61 @@ def extract_prompts(input_file=None):
             'summary': existing_data.get('summary', ''),
         })
 
-    print(f"  排除 Grok 回复: {stats['grok']}")
+    if cache is not None:
+        cache.flush()
+    classify_cache.save()
+    if classify_cache.hits:
+        print(f"  🗃️  分类缓存命中: {classify_cache.hits}")
+    print(f"  本次评估新推文: {evaluated}")
+    print(f"  排除指定作者: {stats['author']}")
     print(f"  排除新闻转述: {stats['news']}")
+    print(f"  排除垃圾推文: {stats['spam']}")
     print(f"  排除无视频: {stats['no_video']}")
     print(f"  排除无 prompt: {stats['no_prompt']}")
     print(f"  初步匹配: {len(results)}")
+    if rule_hits:
+        print("  规则命中: " + ", ".join(f"{rid}={n}" for rid, n in sorted(rule_hits.items())))
 
-    # 去重
-    groups = defaultdict(list)
-    for r in results:
-        groups[normalize_prompt(r['prompt'])].append(r)
+    # 去重：完全相同或近似重复的 prompt 归为一簇
+    clusters = cluster_near_duplicates([r['prompt'] for r in results], near_dup_threshold)
+    groups = [[results[i] for i in cluster] for cluster in clusters]
 
     deduplicated = []
     dup_count = 0
-    for group in groups.values():
+    for group in groups:
         # 按互动量降序排序，取最高那条
         group.sort(key=lambda x: x['engagement_score'], reverse=True)
         best_entry = group[0]
         
         # 再次确保分类数据完整（如果同组中有其他条目有分类数据，也可以考虑合并，这里简单取 best_entry 的）
-        # 因为 best_entry 的 tags 来自 existing_map (基于 prompt文本)，所以理论上已经有了。
+        # 因为 best_entry 的 tags 来自 existing_full / 分类缓存 (基于 prompt文本)，所以理论上已经有了。
         
         deduplicated.append(best_entry)
         dup_count += len(group) - 1
 
     deduplicated.sort(key=lambda x: x['engagement_score'], reverse=True)
 
-    print(f"  去重移除: {dup_count}")
+    print(f"  去重移除: {dup_count} (近似重复簇 {sum(1 for g in groups if len(g) > 1)} 个)")
     print(f"  ✅ 最终素材数: {len(deduplicated)}")
 
     # 保存
+    metadata = {
+        'total_tweets': total_tweets,
+        'prompts_extracted': len(deduplicated),
+        'last_updated': '',
+        'description': 'Seedance Prompt Library - AI video prompt examples with results',
+    }
+
+    if db is not None:
+        # 主键用完整归一化文本：开头相同的不同 prompt 现在会各自保留
+        keyed = [(prompt_hash(canonical_text(p['prompt'])), p) for p in deduplicated]
+        written, reranked, removed = db.sync_prompts(keyed, metadata)
+        db.close()
+        print(f"📁 已更新数据库: {db.root} (写入 {written} 行, 改排名 {reranked} 行, 删除 {removed} 行)")
+        return db.root
+
     library = {
-        'metadata': {
-            'total_tweets': len(tweets),
-            'prompts_extracted': len(deduplicated),
-            'last_updated': '',
-            'description': 'Seedance Prompt Library - AI video prompt examples with results',
-        },
+        'metadata': metadata,
         'prompts': deduplicated,
     }
 
@@ -295,4 +411,13 @@ def extract_prompts(input_file=None):
 
 
 if __name__ == '__main__':
-    extract_prompts()
+    import argparse
+    parser = argparse.ArgumentParser(description='Extract prompt + video tweets into the prompt library')
+    parser.add_argument('--input', help='Read tweets from a JSON array file instead of the tweet store')
+    parser.add_argument('--no-cache', action='store_true', help='Evaluate every tweet, ignoring data/extract_cache.jsonl')
+    parser.add_argument('--workers', type=int, default=1, help='Processes for evaluating tweets (0 = all cores)')
+    parser.add_argument('--near-dup-threshold', type=float,
+                        help='Similarity for merging near-duplicate prompts (default: $NEAR_DUP_THRESHOLD or 0.8; 1 = exact only)')
+    args = parser.parse_args()
+    extract_prompts(input_file=args.input, use_cache=not args.no_cache, workers=args.workers,
+                    near_dup_threshold=args.near_dup_threshold)
@@ -1,21 +1,56 @@
 #!/usr/bin/env python3
 """
 从 Apify Tweet Scraper V2 采集 Seedance 相关带视频的推文。
-保存为 data/raw/YYYY-MM-DD.json
+保存为 data/raw/YYYY-MM-DD.jsonl.gz（格式见 raw_io.py，RAW_FORMAT 可配置）
 """
 
 import os
 import sys
 import json
+import time
+import threading
 import requests
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
+from raw_io import list_raw_files, read_raw, split_raw_name, write_raw
+from tweet_store import tweet_key, created_ts, TWITTER_DATE_FORMAT
+from media_info import describe_media, media_context
+from http_client import HttpClient
+
 load_dotenv()
 
 APIFY_TOKEN = os.getenv('APIFY_TOKEN')
 ACTOR_ID = 'apidojo/tweet-scraper'
+# 可指向本地的 Apify API 替身做测试
+APIFY_API_BASE = os.getenv('APIFY_API_BASE', 'https://api.apify.com/v2').rstrip('/')
+# 状态轮询：从 POLL_MIN 秒开始，进度不变时翻倍，最多 POLL_MAX 秒
+POLL_MIN = float(os.getenv('APIFY_POLL_MIN', '2'))
+POLL_MAX = float(os.getenv('APIFY_POLL_MAX', '30'))
+TERMINAL_STATUSES = ('SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT')
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FETCH_DIR = os.path.join(BASE_DIR, 'data', '.fetch')
+FETCH_STATE_FILE = os.path.join(BASE_DIR, 'data', 'fetch_state.json')
+# 高水位之前额外回看的分钟数，覆盖 Apify 索引延迟和时钟误差
+OVERLAP_MINUTES = int(os.getenv('FETCH_OVERLAP_MINUTES', '60'))
+
+# Dataset 分页下载：每页条数、单页重试次数
+PAGE_SIZE = 500
+PAGE_RETRIES = 4
+# Apify 请求共用一个连接池；启动 Actor 不重试（重发会多跑一次），状态轮询失败时重试
+APIFY_HTTP = HttpClient('apify', timeouts={'run': 30, 'status': 30, 'dataset': 60},
+                        retries=int(os.getenv('APIFY_HTTP_RETRIES', '3')))
+# slim_tweet 实际读取的字段，下载时只取这些
+DATASET_FIELDS = [
+    'id', 'twitterUrl', 'url', 'fullText', 'text', 'createdAt', 'lang',
+    'likeCount', 'retweetCount', 'replyCount', 'quoteCount', 'bookmarkCount',
+    'isQuote', 'isReply', 'isRetweet', 'author', 'media',
+]
+
+
+class RunGone(RuntimeError):
+    """run 已经确定续不上：Apify 报告失败 / 中止 / 超时，或者 run、Dataset 已过期（404）"""
 
 
 def to_actor_api_path(actor_id):
@@ -25,21 +60,123 @@ def to_actor_api_path(actor_id):
     return actor_id.replace('/', '~')
 
 
-def fetch_tweets(days_back=1, max_items=4000):
-    """调用 Apify API 采集推文"""
-    if not APIFY_TOKEN:
-        print("❌ APIFY_TOKEN 未设置，请在 .env 文件中配置")
-        sys.exit(1)
+def load_fetch_state():
+    """读取采集状态（高水位等），不存在时返回空字典"""
+    if not os.path.exists(FETCH_STATE_FILE):
+        return {}
+    with open(FETCH_STATE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_fetch_state(state):
+    """原子写入采集状态"""
+    tmp_file = FETCH_STATE_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_file, FETCH_STATE_FILE)
+
+
+_state_lock = threading.Lock()
+
+
+def update_fetch_state(fn):
+    """读-改-写采集状态；分片线程并发登记 run 时靠锁串行化"""
+    with _state_lock:
+        state = load_fetch_state()
+        fn(state)
+        save_fetch_state(state)
+
+
+def register_run(run_id, dataset_id, search_term, stem, since_dt, max_items, group=None):
+    """
+    Actor 启动后立即登记 run id / dataset id，进程中断后可以续上而不必重新付费采集。
+    stem 为空表示结果按推文日期拆分保存（分片模式），无法解析日期的推文归到 since_dt 当天。
+    since_dt / max_items 用于续上后判断结果是否被条数上限截断。
+    group 为同一次分片采集的编号，续上时同组的 run 一起决定高水位能推进到哪里。
+    """
+    def add(state):
+        state.setdefault('pending_runs', {})[run_id] = {
+            'dataset_id': dataset_id,
+            'search_term': search_term,
+            'stem': stem,
+            'group': group or run_id,
+            'since_day': since_dt.strftime('%Y-%m-%d'),
+            'since_ts': int(since_dt.timestamp()),
+            'max_items': max_items,
+            'started_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+    update_fetch_state(add)
+
+
+def clear_runs(run_ids):
+    def drop(state):
+        pending = state.get('pending_runs', {})
+        for run_id in run_ids:
+            pending.pop(run_id, None)
+    update_fetch_state(drop)
+
+
+def lower_group_floor(group, floor_ts):
+    """
+    同组还没采到的时间段从 floor_ts 开始（分片失败、run 已过期）：
+    记在组内仍待续上的 run 上，之后它们续上时高水位也不越过 floor_ts。
+    """
+    def lower(state):
+        for run_id, run in state.get('pending_runs', {}).items():
+            if (run.get('group') or run_id) == group:
+                run['floor_ts'] = min(run.get('floor_ts', floor_ts), floor_ts)
+    update_fetch_state(lower)
+
+
+def advance_watermark(state, part_files, limit_ts=None):
+    """
+    用本次采集到的最新推文推进高水位（只前进不后退）。
+    limit_ts 给出时最多推进到该时间：Apify 先返回最新的推文，某次 run 达到条数上限时
+    窗口开头那段没有采全，高水位不能越过这次 run 的起点。
+    """
+    old = state.get('watermark') or {'ts': 0}
+    mark = {'ts': 0}
+    for part_file in part_files:
+        for tweet in iter_part_file(part_file):
+            ts = created_ts(tweet.get('createdAt', ''))
+            if ts > mark['ts']:
+                mark = {'ts': ts, 'created_at': tweet.get('createdAt', ''), 'id': tweet_key(tweet)}
+    if limit_ts is not None and mark['ts'] > limit_ts:
+        mark = {'ts': limit_ts, 'created_at': datetime.fromtimestamp(limit_ts, timezone.utc).strftime(TWITTER_DATE_FORMAT),
+                'id': ''}
+    if mark['ts'] > old['ts']:
+        state['watermark'] = mark
+    return state
 
-    today = datetime.utcnow()
-    since_date = (today - timedelta(days=days_back)).strftime('%Y-%m-%d')
-    # until_date 设为明天，确保包含今天的所有推文
-    until_date = (today + timedelta(days=1)).strftime('%Y-%m-%d')
 
-    actor_input = {
-        "searchTerms": [
-            f"Seedance prompt since:{since_date} until:{until_date}"
-        ],
+def capped_limit(capped_since):
+    """达到条数上限的 run 的起点（datetime 列表）→ advance_watermark 的 limit_ts"""
+    if not capped_since:
+        return None
+    print(f"⚠️ {len(capped_since)} 次采集达到条数上限，高水位不越过其起点（可以调大 --max 或用 --shard-hours 切小窗口）")
+    return int(min(capped_since).timestamp())
+
+
+def window_start(days_back, use_watermark, overlap_minutes):
+    """
+    采集窗口起点：默认今天 0 点往前 days_back 天；
+    有高水位时从「高水位 - overlap」开始，但不早于默认起点。
+    """
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    since_dt = today - timedelta(days=days_back)
+    mark = load_fetch_state().get('watermark') if use_watermark else None
+    if mark and mark.get('ts'):
+        mark_dt = datetime.fromtimestamp(mark['ts'] - overlap_minutes * 60, timezone.utc)
+        if mark_dt > since_dt:
+            print(f"📍 高水位: {mark.get('created_at')} (回看 {overlap_minutes} 分钟)")
+            since_dt = mark_dt.replace(second=0)
+    return since_dt
+
+
+def build_actor_input(search_term, max_items):
+    """构造 Actor 输入"""
+    return {
+        "searchTerms": [search_term],
         "sort": "Latest",
         "maxItems": max_items,
         "onlyVideo": True,
@@ -50,69 +187,379 @@ def fetch_tweets(days_back=1, max_items=4000):
         "onlyImage": False,
     }
 
-    print(f"🔍 采集参数: Seedance prompt since:{since_date} until:{until_date}")
-    print(f"   最大条数: {max_items}, 仅视频: True")
 
-    # 1. 启动 Actor
+def format_search_time(dt):
+    """整点日期用 YYYY-MM-DD，否则用 X 搜索支持的 YYYY-MM-DD_HH:MM:SS_UTC"""
+    if dt.hour == dt.minute == dt.second == 0:
+        return dt.strftime('%Y-%m-%d')
+    return dt.strftime('%Y-%m-%d_%H:%M:%S_UTC')
+
+
+def build_search_term(since_dt, until_dt):
+    return f"Seedance prompt since:{format_search_time(since_dt)} until:{format_search_time(until_dt)}"
+
+
+def start_actor_run(actor_input, label=''):
+    """启动 Actor，返回 (run_id, dataset_id)"""
     actor_path = to_actor_api_path(ACTOR_ID)
-    run_url = f"https://api.apify.com/v2/acts/{actor_path}/runs?token={APIFY_TOKEN}"
-    print("🚀 启动 Apify Actor...")
-    resp = requests.post(run_url, json=actor_input, timeout=30)
+    run_url = f"{APIFY_API_BASE}/acts/{actor_path}/runs?token={APIFY_TOKEN}"
+    print(f"🚀 {label}启动 Apify Actor...")
+    resp = APIFY_HTTP.post(run_url, json=actor_input, endpoint='run', retries=0)
     if not resp.ok:
-        print(f"❌ 启动 Actor 失败: HTTP {resp.status_code}")
+        print(f"❌ {label}启动 Actor 失败: HTTP {resp.status_code}")
         print(resp.text[:500])
         raise RuntimeError(f"启动 Apify Actor 失败: HTTP {resp.status_code}")
     run_data = resp.json()['data']
     run_id = run_data['id']
     dataset_id = run_data['defaultDatasetId']
-    print(f"   Run ID: {run_id}")
-    print(f"   Dataset ID: {dataset_id}")
+    print(f"   {label}Run ID: {run_id}")
+    print(f"   {label}Dataset ID: {dataset_id}")
+    return run_id, dataset_id
+
 
-    # 2. 等待完成
-    status_url = f"https://api.apify.com/v2/actor-runs/{run_id}?token={APIFY_TOKEN}"
-    import time
-    print("⏳ 等待采集完成...")
+def wait_for_run(run_id, label='', initial_delay=POLL_MIN):
+    """
+    轮询 Actor 运行状态直到结束，返回最终状态。
+    间隔自适应：Actor 报告的进度（statusMessage）有变化时回到 POLL_MIN，否则翻倍直到 POLL_MAX。
+    """
+    status_url = f"{APIFY_API_BASE}/actor-runs/{run_id}?token={APIFY_TOKEN}"
+    print(f"⏳ {label}等待采集完成...")
+    interval = initial_delay
+    last_progress = None
     while True:
-        time.sleep(10)
-        status_resp = requests.get(status_url, timeout=30)
+        time.sleep(interval)
+        status_resp = APIFY_HTTP.get(status_url, endpoint='status')
+        if status_resp.status_code == 404:
+            raise RunGone(f"Actor run 不存在或已过期: {run_id}")
         if not status_resp.ok:
             raise RuntimeError(f"查询 Actor 运行状态失败: HTTP {status_resp.status_code}")
-        status = status_resp.json()['data']['status']
-        print(f"   状态: {status}")
-        if status in ('SUCCEEDED', 'FAILED', 'ABORTED', 'TIMED-OUT'):
-            break
+        run_data = status_resp.json()['data']
+        status = run_data['status']
+        progress = (status, run_data.get('statusMessage', ''))
+        if progress != last_progress:
+            print(f"   {label}状态: {status} {progress[1]}".rstrip())
+        if status in TERMINAL_STATUSES:
+            return status
+        interval = POLL_MIN if progress != last_progress else min(interval * 2, POLL_MAX)
+        last_progress = progress
 
+
+def finish_run(run_id, dataset_id, label='', initial_delay=POLL_MIN):
+    """等待已启动的 run 结束并下载结果，返回 (part 文件, 条数)"""
+    status = wait_for_run(run_id, label, initial_delay)
     if status != 'SUCCEEDED':
-        print(f"❌ Actor 运行失败: {status}")
+        raise RunGone(f"Actor 运行失败: {status}")
+    return download_dataset(dataset_id, label=label)
+
+
+def run_search(since_dt, until_dt, max_items, label='', stem=None, group=None):
+    """启动一次搜索并下载结果，返回 (part 文件, 条数, run_id)；run 在完成保存前一直登记在状态文件中"""
+    search_term = build_search_term(since_dt, until_dt)
+    run_id, dataset_id = start_actor_run(build_actor_input(search_term, max_items), label)
+    register_run(run_id, dataset_id, search_term, stem, since_dt, max_items, group)
+    part_file, count = finish_run(run_id, dataset_id, label)
+    return part_file, count, run_id
+
+
+def resume_pending_runs():
+    """
+    续上之前中断的 Actor run：已结束的直接下载，仍在运行的继续轮询。
+    同一次分片采集的 run 按组处理：组内有 run 已过期或这次仍续不上时，
+    高水位最多推进到它们中最早的起点，那段时间留给下次正常采集补上。
+    返回写入的快照列表。
+    """
+    pending = load_fetch_state().get('pending_runs', {})
+    if not pending:
+        return []
+
+    print(f"♻️  发现 {len(pending)} 个未完成的 Actor run，继续处理")
+    groups = {}
+    for run_id, run in sorted(pending.items(), key=lambda kv: kv[1].get('started_at', '')):
+        groups.setdefault(run.get('group') or run_id, []).append((run_id, run))
+
+    output_files = []
+    for group, runs in groups.items():
+        part_files = []
+        resolved = []
+        capped = []
+        # 组内没有采到的时间段的起点：之前记下的、这次过期的、这次仍续不上的
+        floors = [run['floor_ts'] for _, run in runs if run.get('floor_ts')]
+        gone = []
+        for run_id, run in runs:
+            label = f"[{run_id}] "
+            print(f"   {label}{run.get('search_term', '')}")
+            try:
+                part_file, count = finish_run(run_id, run['dataset_id'], label, initial_delay=0)
+            except RunGone as e:
+                # run 已失败或已过期，续不上就放弃，交给正常采集重跑
+                print(f"❌ {label}无法续上: {e}")
+                resolved.append(run_id)
+                if run.get('since_ts'):
+                    gone.append(run['since_ts'])
+                continue
+            except (RuntimeError, requests.exceptions.RequestException) as e:
+                # 查询状态或下载失败可能只是暂时的，run 留在状态文件里下次再续
+                print(f"⚠️ {label}暂时无法续上，下次再试: {e}")
+                if run.get('since_ts'):
+                    floors.append(run['since_ts'])
+                continue
+            if run.get('stem'):
+                output_files.append(merge_into_snapshot(run['stem'], {tweet_key(t): t for t in iter_part_file(part_file)}))
+            else:
+                output_files.extend(save_by_day([part_file], run['since_day']))
+            if run.get('max_items') and count >= run['max_items']:
+                capped.append(datetime.fromtimestamp(run['since_ts'], timezone.utc))
+            part_files.append(part_file)
+            resolved.append(run_id)
+            print(f"✅ {label}已恢复 {count} 条")
+
+        floors += gone
+        limit_ts = capped_limit(capped)
+        if floors:
+            print(f"⚠️ 同组还有时间段没采到，高水位不越过 "
+                  f"{datetime.fromtimestamp(min(floors), timezone.utc).strftime('%Y-%m-%d %H:%M')} UTC")
+            limit_ts = min(floors + ([limit_ts] if limit_ts is not None else []))
+        if part_files:
+            update_fetch_state(lambda state: advance_watermark(state, part_files, limit_ts))
+        clear_runs(resolved)
+        if gone:
+            # 组里剩下的 run 以后续上时也要记得过期 run 的时间段
+            lower_group_floor(group, min(gone))
+        for part_file in part_files:
+            os.remove(part_file)
+    return output_files
+
+
+def fetch_from_dataset(dataset_id):
+    """直接下载已有的 Dataset（例如手动在 Apify 控制台跑的），按推文日期保存"""
+    part_file, count = download_dataset(dataset_id)
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    output_files = save_by_day([part_file], today)
+    update_fetch_state(lambda state: advance_watermark(state, [part_file]))
+    os.remove(part_file)
+    print(f"✅ 已保存 Dataset {dataset_id}: {count} 条, {len(output_files)} 个快照")
+    return output_files
+
+
+def split_window(since_dt, until_dt, shard_hours):
+    """把 [since, until) 按 shard_hours 切成若干子窗口"""
+    step = timedelta(hours=shard_hours)
+    shards = []
+    start = since_dt
+    while start < until_dt:
+        end = min(start + step, until_dt)
+        shards.append((start, end))
+        start = end
+    return shards
+
+
+def tweet_day(tweet, default):
+    """推文发布日期（UTC），无法解析时归到 default"""
+    ts = created_ts(tweet.get('createdAt', ''))
+    if not ts:
+        return default
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+
+
+def merge_into_snapshot(stem, fresh):
+    """
+    把 {id: tweet} 合并进同名快照：已有快照时取并集，同一 id 以本次采集为准（互动数更新）。
+    只影响 raw 快照：推文存储按 id 先到先得，已入库的推文不会被更新。
+    返回写入的文件路径。
+    """
+    merged = {}
+    for path in list_raw_files():
+        if split_raw_name(path)[0] == stem:
+            for tweet in read_raw(path):
+                merged[tweet_key(tweet)] = tweet
+    added = sum(1 for tid in fresh if tid not in merged)
+    merged.update(fresh)
+    output_file = write_raw(stem, merged.values())
+    print(f"  📄 {os.path.basename(output_file)}: {len(merged)} 条 (本次 {len(fresh)}, 新增 {added})")
+    return output_file
+
+
+def save_by_day(part_files, default_day):
+    """把各分片结果按推文发布日期合并进对应的每日快照，返回写入的文件列表"""
+    by_day = {}
+    for part_file in part_files:
+        for tweet in iter_part_file(part_file):
+            by_day.setdefault(tweet_day(tweet, default_day), {})[tweet_key(tweet)] = tweet
+    return [merge_into_snapshot(day, fresh) for day, fresh in sorted(by_day.items())]
+
+
+def require_token():
+    if not APIFY_TOKEN:
+        print("❌ APIFY_TOKEN 未设置，请在 .env 文件中配置")
+        sys.exit(1)
+
+
+def fetch_tweets(days_back=1, max_items=4000, shard_hours=None, concurrency=4,
+                 use_watermark=True, overlap_minutes=OVERLAP_MINUTES):
+    """
+    调用 Apify API 采集推文。
+    先续上中断遗留的 Actor run，再按窗口发起新的采集：
+    shard_hours 为空时整个窗口一次 Actor 运行，合并进 <since_date> 快照；
+    否则按 shard_hours 切分窗口，最多 concurrency 个 Actor 并发运行，结果按天合并进每日快照。
+    use_watermark 时只采集上次高水位（减去 overlap_minutes）之后的推文。
+    """
+    require_token()
+    resume_pending_runs()
+
+    since_dt = window_start(days_back, use_watermark, overlap_minutes)
+    # until 设为明天，确保包含今天的所有推文
+    until_dt = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    since_date = since_dt.strftime('%Y-%m-%d')
+
+    if shard_hours:
+        return fetch_sharded(since_dt, until_dt, max_items, shard_hours, concurrency)
+
+    print(f"🔍 采集参数: {build_search_term(since_dt, until_dt)}")
+    print(f"   最大条数: {max_items}, 仅视频: True")
+
+    try:
+        part_file, cleaned, run_id = run_search(since_dt, until_dt, max_items, stem=since_date)
+    except RuntimeError as e:
+        print(f"❌ {e}")
         sys.exit(1)
 
-    # 3. 下载数据
-    data_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items?token={APIFY_TOKEN}&format=json"
-    print("📥 下载数据...")
-    data_resp = requests.get(data_url, timeout=120)
-    if not data_resp.ok:
-        raise RuntimeError(f"下载 Dataset 数据失败: HTTP {data_resp.status_code}")
-    raw_tweets = data_resp.json()
-
-    print(f"   获取到 {len(raw_tweets)} 条推文")
-
-    # 4. 精简字段
-    cleaned = []
-    for tweet in raw_tweets:
-        cleaned.append(slim_tweet(tweet))
-
-    # 5. 保存
-    output_dir = os.path.join(BASE_DIR, 'data', 'raw')
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, f'{since_date}.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(cleaned, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ 已保存: {output_file} ({len(cleaned)} 条)")
+    output_file = merge_into_snapshot(since_date, {tweet_key(t): t for t in iter_part_file(part_file)})
+    limit_ts = capped_limit([since_dt] if cleaned >= max_items else [])
+    update_fetch_state(lambda state: advance_watermark(state, [part_file], limit_ts))
+    clear_runs([run_id])
+    os.remove(part_file)
+
+    print(f"✅ 已保存: {output_file} ({cleaned} 条)")
     return output_file
 
 
-def slim_tweet(tweet):
+def fetch_sharded(since_dt, until_dt, max_items, shard_hours, concurrency):
+    """分片并发采集，返回写入的每日快照列表"""
+    shards = split_window(since_dt, until_dt, shard_hours)
+    print(f"🔍 分片采集: {build_search_term(since_dt, until_dt)}")
+    print(f"   {len(shards)} 个分片 × {shard_hours} 小时, 并发 {concurrency}, 每片最大条数: {max_items}")
+
+    part_files = []
+    run_ids = []
+    failures = []
+    capped = []
+    group = datetime.now(timezone.utc).strftime('shard-%Y%m%dT%H%M%S%f')
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(run_search, s, u, max_items, f"[{format_search_time(s)}] ", group=group): (s, u)
+            for s, u in shards
+        }
+        for future in as_completed(futures):
+            s, _ = futures[future]
+            try:
+                part_file, count, run_id = future.result()
+                part_files.append(part_file)
+                run_ids.append(run_id)
+                if count >= max_items:
+                    capped.append(s)
+            except Exception as e:
+                print(f"❌ [{format_search_time(s)}] 分片失败: {e}")
+                failures.append(s)
+
+    # 成功的分片照常落盘，失败的下次重跑即可
+    output_files = save_by_day(sorted(part_files), since_dt.strftime('%Y-%m-%d'))
+    # 有分片失败时不推进高水位，避免跳过失败分片的时间段
+    if not failures:
+        limit_ts = capped_limit(capped)
+        update_fetch_state(lambda state: advance_watermark(state, part_files, limit_ts))
+    clear_runs(run_ids)
+    if failures:
+        # 已登记 run 的失败分片续上时按组处理；没登记上的（启动就失败）记为组的下限，
+        # 否则同组别的 run 续上后高水位会越过它们的时间段
+        registered = {run.get('since_ts') for run in load_fetch_state().get('pending_runs', {}).values()
+                      if run.get('group') == group}
+        lost = [int(s.timestamp()) for s in failures if int(s.timestamp()) not in registered]
+        if lost:
+            lower_group_floor(group, min(lost))
+    for part_file in part_files:
+        os.remove(part_file)
+
+    print(f"✅ 分片采集完成: {len(shards) - len(failures)}/{len(shards)} 个分片, 写入 {len(output_files)} 个快照")
+    if failures:
+        raise RuntimeError(f"{len(failures)} 个分片采集失败")
+    return output_files
+
+
+def fetch_page(dataset_id, offset, limit, label=''):
+    """下载 Dataset 的一页（只取 DATASET_FIELDS），失败时由 APIFY_HTTP 退避重试"""
+    data_url = f"{APIFY_API_BASE}/datasets/{dataset_id}/items"
+    params = {
+        'token': APIFY_TOKEN,
+        'format': 'json',
+        'clean': 'true',
+        'offset': offset,
+        'limit': limit,
+        'fields': ','.join(DATASET_FIELDS),
+    }
+    try:
+        resp = APIFY_HTTP.get(data_url, params=params, endpoint='dataset', retries=PAGE_RETRIES - 1)
+        if resp.status_code == 404:
+            raise RunGone(f"Dataset 不存在或已过期: {dataset_id}")
+        if resp.ok:
+            return resp.json()
+        error = f"HTTP {resp.status_code}"
+    except (requests.exceptions.RequestException, ValueError) as e:
+        error = str(e)
+    print(f"   ❌ {label}第 {offset} 条起的分页下载失败 ({error})")
+    raise RuntimeError(f"下载 Dataset 分页失败: offset={offset}")
+
+
+def download_dataset(dataset_id, page_size=PAGE_SIZE, label=''):
+    """
+    分页下载 Dataset，每页精简后立即追加到 data/.fetch/<dataset_id>.jsonl.part。
+    内存只保留一页；中断后再次调用会从已写入的条数继续，最多丢一页。
+    返回 (part 文件路径, 已下载总条数)，条数包含续传前已有的部分。
+    """
+    os.makedirs(FETCH_DIR, exist_ok=True)
+    part_file = os.path.join(FETCH_DIR, f'{dataset_id}.jsonl.part')
+
+    offset = count_part_lines(part_file)
+    if offset:
+        print(f"   ♻️  {label}续传: 已有 {offset} 条")
+
+    print(f"📥 {label}下载数据...")
+    media_ctx = media_context()
+    with open(part_file, 'a', encoding='utf-8') as out:
+        while True:
+            items = fetch_page(dataset_id, offset, page_size, label)
+            for item in items:
+                out.write(json.dumps(slim_tweet(item, media_ctx), ensure_ascii=False) + '\n')
+            out.flush()
+            offset += len(items)
+            print(f"   {label}已下载 {offset} 条")
+            if len(items) < page_size:
+                break
+
+    print(f"   {label}获取到 {offset} 条推文")
+    return part_file, offset
+
+
+def count_part_lines(part_file):
+    """统计 part 文件中完整的行数，并截掉中断时写了一半的末行"""
+    if not os.path.exists(part_file):
+        return 0
+    with open(part_file, 'rb+') as f:
+        data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            f.truncate(complete)
+    return data.count(b'\n', 0, complete)
+
+
+def iter_part_file(part_file):
+    """逐行读取 part 文件中已精简的推文"""
+    with open(part_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def slim_tweet(tweet, media_ctx=None):
     """精简推文字段，只保留核心数据"""
     # 处理 author 字段 - Apify 返回可能是嵌套也可能是扁平
     author = tweet.get('author', {})
@@ -144,7 +591,7 @@ def slim_tweet(tweet):
             if m:
                 media.append(m)
 
-    return {
+    slim = {
         'id': tweet.get('id', tweet.get('twitterUrl', '')),
         'url': tweet.get('url', tweet.get('twitterUrl', '')),
         'text': tweet.get('fullText', tweet.get('text', '')),
@@ -161,12 +608,32 @@ def slim_tweet(tweet):
         'author': author_info,
         'media': media,
     }
+    # 媒体描述符入库时算一次，提取阶段直接读取
+    slim['media_info'] = describe_media(slim, media_ctx)
+    return slim
 
 
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description='Fetch Seedance tweets from Apify')
     parser.add_argument('--days', type=int, default=1, help='Days back to fetch')
-    parser.add_argument('--max', type=int, default=4000, help='Max tweets to fetch')
+    parser.add_argument('--max', type=int, default=4000, help='Max tweets to fetch (per shard when sharded)')
+    parser.add_argument('--shard-hours', type=int, help='Split the window into N-hour shards fetched concurrently')
+    parser.add_argument('--concurrency', type=int, default=4, help='Max concurrent actor runs when sharded')
+    parser.add_argument('--no-watermark', action='store_true',
+                        help='Ignore the high-water mark and re-fetch the full --days window, e.g. to fill gaps '
+                             '(only the raw snapshots get fresh engagement counts; the tweet store keeps its first copy)')
+    parser.add_argument('--overlap-minutes', type=int, default=OVERLAP_MINUTES,
+                        help='Minutes to re-fetch before the high-water mark')
+    parser.add_argument('--resume', action='store_true', help='Only resume interrupted actor runs, do not start new ones')
+    parser.add_argument('--from-dataset', metavar='DATASET_ID', help='Download an existing Apify dataset instead of running the actor')
     args = parser.parse_args()
-    fetch_tweets(days_back=args.days, max_items=args.max)
+    require_token()
+    if args.from_dataset:
+        fetch_from_dataset(args.from_dataset)
+    elif args.resume:
+        resume_pending_runs()
+    else:
+        fetch_tweets(days_back=args.days, max_items=args.max, shard_hours=args.shard_hours, concurrency=args.concurrency,
+                     use_watermark=not args.no_watermark, overlap_minutes=args.overlap_minutes)
+    APIFY_HTTP.print_stats()
@@ -6,10 +6,12 @@
 
 import os
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import email.utils
 import argparse
 
+from sqlite_store import SqliteStore, use_sqlite
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_FILE = os.path.join(BASE_DIR, 'data', 'prompt_library.json')
 DATA_FILE_REL = os.path.relpath(DATA_FILE, BASE_DIR)
@@ -22,7 +24,22 @@ def parse_twitter_date(date_str):
     except:
         return datetime.min.replace(tzinfo=None)
 
+def build_report_from_db():
+    """SQLite 后端：只通过索引查询统计量和 Top 5，不加载全量 prompt"""
+    db = SqliteStore()
+    try:
+        one_day_ago = datetime.utcnow() - timedelta(days=1.5)
+        since_ts = int(one_day_ago.replace(tzinfo=timezone.utc).timestamp())
+        return db.prompt_count(), db.count_prompts_since(since_ts), db.top_prompts_by_likes(5)
+    finally:
+        db.close()
+
+
 def build_report_text():
+    if use_sqlite():
+        total_count, new_count, top_prompts = build_report_from_db()
+        return format_report(total_count, new_count, top_prompts)
+
     if not os.path.exists(DATA_FILE):
         raise FileNotFoundError("找不到数据文件 data/prompt_library.json")
 
@@ -55,6 +72,10 @@ def build_report_text():
     # 按 likes 降序
     top_prompts = sorted(prompts, key=lambda x: x.get('likes', 0), reverse=True)[:5]
 
+    return format_report(total_count, new_count, top_prompts)
+
+
+def format_report(total_count, new_count, top_prompts):
     # 3. 生成文案
     today_str = datetime.now().strftime('%Y-%m-%d')
     
@@ -8,6 +8,9 @@ import json
 from datetime import datetime
 from collections import Counter
 
+from sqlite_store import SqliteStore, use_sqlite
+from blacklist import load_blacklist
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
@@ -89,7 +92,7 @@ Visit the **[Interactive Gallery](https://promptlib.miemieweaver.com)** to brows
 ## 📥 Data Files
 
 - [`data/prompt_library.json`](data/prompt_library.json) — Full prompt library (JSON)
-- [`data/all_tweets.json`](data/all_tweets.json) — All collected tweets
+- [`data/tweets/`](data/tweets/) — All collected tweets (append-only JSONL segments)
 
 ## 🤖 How It Works
 
@@ -664,26 +667,22 @@ def generate_site():
     """生成 README 和 HTML 展示页"""
     library_file = os.path.join(BASE_DIR, 'data', 'prompt_library.json')
 
-    if not os.path.exists(library_file):
-        print("❌ prompt_library.json 不存在")
-        return
+    if use_sqlite():
+        db = SqliteStore()
+        library = db.load_library()
+        db.close()
+    else:
+        if not os.path.exists(library_file):
+            print("❌ prompt_library.json 不存在")
+            return
 
-    with open(library_file, 'r', encoding='utf-8') as f:
-        library = json.load(f)
+        with open(library_file, 'r', encoding='utf-8') as f:
+            library = json.load(f)
 
     print(f"📦 加载 {len(library['prompts'])} 条 prompt")
 
-    # 加载黑名单
-    blacklist_file = os.path.join(BASE_DIR, 'data', 'blacklist.txt')
-    blacklist = set()
-    if os.path.exists(blacklist_file):
-        with open(blacklist_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                url = line.strip()
-                if url and not url.startswith('#'):
-                    blacklist.add(url)
-
-    # 过滤黑名单
+    # 过滤黑名单（按规范 tweet id 匹配，x.com / twitter.com 等写法都能识别）
+    blacklist = load_blacklist()
     original_count = len(library['prompts'])
     library['prompts'] = [p for p in library['prompts'] if p.get('tweet_url') not in blacklist]
     filtered_count = len(library['prompts'])
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+共享的 HTTP 客户端层，fetch_tweets（Apify）和 classify_prompts（Gemini）都经过这里。
+
+- 每个服务一个 requests.Session，keep-alive 连接池在线程间共享，
+  状态轮询、分页下载、分类批次不再每次重新握手
+- 按端点（run / status / dataset、generate / stream）配置超时
+- 连接错误、超时和指定的状态码（默认 429 / 5xx）按带 jitter 的指数退避重试，
+  有 Retry-After 时以它为准；次数按服务配置，单次调用可以覆盖。
+  不能安全重发的请求（启动 Actor）和自己处理限流的调用方（Gemini）用 retries=0
+- 按端点统计请求数、重试数、失败数和耗时，print_stats() 输出
+"""
+
+import os
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 每个服务的连接池大小，不小于并发数
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '16'))
+CONNECT_TIMEOUT = 10
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+class HttpClient:
+    def __init__(self, name, timeouts=None, default_timeout=60, retries=0, retry_statuses=RETRY_STATUSES):
+        self.name = name
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.retry_statuses = retry_statuses
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def timeout_for(self, endpoint):
+        """端点的超时：数字为读超时（连接超时统一 CONNECT_TIMEOUT），也可以直接给 (连接, 读) 元组"""
+        timeout = self.timeouts.get(endpoint, self.default_timeout)
+        return timeout if isinstance(timeout, tuple) else (CONNECT_TIMEOUT, timeout)
+
+    def _count(self, endpoint, key, value=1):
+        with self.lock:
+            c = self.counters.setdefault(endpoint, {'requests': 0, 'retries': 0, 'errors': 0,
+                                                    'seconds': 0.0, 'max_seconds': 0.0})
+            c[key] += value
+            if key == 'seconds':
+                c['max_seconds'] = max(c['max_seconds'], value)
+
+    @staticmethod
+    def backoff_delay(attempt, resp=None):
+        """Retry-After（秒）优先，否则指数退避加 ±20% jitter"""
+        if resp is not None:
+            try:
+                return max(0.0, float(resp.headers.get('Retry-After', '')))
+            except ValueError:
+                pass
+        return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.8, 1.2)
+
+    def request(self, method, url, endpoint='default', retries=None, timeout=None, **kwargs):
+        """发送请求；重试用尽后返回最后一次响应，或抛出最后一次的 RequestException"""
+        retries = self.retries if retries is None else retries
+        timeout = timeout or self.timeout_for(endpoint)
+        attempt = 0
+        while True:
+            self._count(endpoint, 'requests')
+            start = time.monotonic()
+            try:
+                resp = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self._count(endpoint, 'seconds', time.monotonic() - start)
+                self._count(endpoint, 'errors')
+                if attempt >= retries:
+                    raise
+                wait = self.backoff_delay(attempt)
+                print(f"   ⚠️ {self.name} {endpoint} 请求失败 ({e.__class__.__name__})，{wait:.0f} 秒后重试")
+            else:
+                self._count(endpoint, 'seconds', time.monotonic() - start)
+                if resp.status_code not in self.retry_statuses or attempt >= retries:
+                    if not resp.ok:
+                        self._count(endpoint, 'errors')
+                    return resp
+                self._count(endpoint, 'errors')
+                wait = self.backoff_delay(attempt, resp)
+                print(f"   ⚠️ {self.name} {endpoint} 返回 HTTP {resp.status_code}，{wait:.0f} 秒后重试")
+                resp.close()
+            self._count(endpoint, 'retries')
+            time.sleep(wait)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self.lock:
+            return {k: dict(v) for k, v in self.counters.items()}
+
+    def print_stats(self):
+        for endpoint, c in sorted(self.stats().items()):
+            avg = c['seconds'] / c['requests'] if c['requests'] else 0
+            line = f"🌐 {self.name} {endpoint}: {c['requests']} 次请求, 平均 {avg * 1000:.0f} ms, 最长 {c['max_seconds']:.1f} s"
+            if c['retries'] or c['errors']:
+                line += f", 重试 {c['retries']} 次, 失败 {c['errors']} 次"
+            print(line)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+容错的增量 JSON 数组解析，用于 Gemini 返回的分类结果。
+
+JsonArrayStream.feed() 可以分多次喂入文本，每次返回这一次新完整的数组元素；
+第一个 '[' 之前的内容（```json 围栏、说明文字）直接忽略。
+某个元素格式错误只丢掉这一个元素；回复被截断时 close() 会从剩余文本里
+把还能解析的对象捞出来，已经完整的元素不受影响。
+"""
+
+import json
+
+_decoder = json.JSONDecoder()
+
+
+def salvage_objects(text):
+    """从一段可能残缺的文本里取出所有能完整解析的 {...} 对象"""
+    items = []
+    pos = text.find('{')
+    while pos != -1:
+        try:
+            obj, end = _decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            pos = text.find('{', pos + 1)
+            continue
+        items.append(obj)
+        pos = text.find('{', end)
+    return items
+
+
+class JsonArrayStream:
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.buf = []
+        # 无法解析、被丢弃的元素数
+        self.skipped = 0
+
+    def _flush(self, items):
+        text = ''.join(self.buf).strip()
+        self.buf = []
+        if not text:
+            return
+        try:
+            items.append(json.loads(text))
+        except json.JSONDecodeError:
+            # 可能是几个元素粘在一起（中间有一个坏掉的），逐个对象抢救
+            found = salvage_objects(text)
+            if not found:
+                self.skipped += 1
+            items.extend(found)
+
+    def feed(self, text):
+        """喂入一段文本，返回新完整的元素"""
+        items = []
+        for ch in text:
+            if self.done:
+                break
+            if not self.started:
+                self.started = ch == '['
+                continue
+            if self.in_string:
+                self.buf.append(ch)
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            if ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                if self.depth == 0:
+                    # 顶层数组结束
+                    self._flush(items)
+                    self.done = True
+                    continue
+                self.depth -= 1
+            elif ch == ',' and self.depth == 0:
+                self._flush(items)
+                continue
+            self.buf.append(ch)
+        return items
+
+    def close(self):
+        """输入结束：返回未闭合的剩余部分里还能解析的元素"""
+        if self.done or not self.buf:
+            return []
+        text = ''.join(self.buf)
+        self.buf = []
+        items = salvage_objects(text)
+        if not items and text.strip():
+            self.skipped += 1
+        return items
+
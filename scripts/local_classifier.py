@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+本地轻量预分类：用素材库里 Gemini 已经分好的 prompt 训练 TF-IDF + 多项式朴素贝叶斯（NumPy 实现）。
+
+- 特征：英文单词 + 中日韩文字的单字和相邻两字，TF 取 1+log，L2 归一化
+- 标签：取概率最高的标签，第二名概率不低于第一名的 SECOND_TAG_RATIO 时一并给出；
+  quality_score 用同样的特征单独训练一个分类器
+- 训练时留出 1/5 的样本校准置信度阈值：置信度 ≥ 阈值的预测，主标签准确率要达到
+  LOCAL_CLASSIFIER_PRECISION。classify_prompts 只把低于阈值的 prompt 发给 Gemini；
+  没有 GEMINI_API_KEY 或 API 不可用时，剩下的也先用本地结果填上
+
+本地分类的结果带 tag_source = 'local'，不进分类缓存，也不作为训练数据；
+extract_prompts 重新提取时会丢掉它们，下次运行重新预测或交给 Gemini。
+
+模型保存在 data/local_classifier.npz，超过 LOCAL_CLASSIFIER_MAX_AGE_DAYS 天由 classify_prompts 自动重新训练。
+
+手动训练 / 评估：python scripts/local_classifier.py train|eval
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+from collections import Counter
+from dotenv import load_dotenv
+
+from sqlite_store import SqliteStore, use_sqlite
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_FILE = os.path.join(BASE_DIR, 'data', 'local_classifier.npz')
+LIBRARY_FILE = os.path.join(BASE_DIR, 'data', 'prompt_library.json')
+TARGET_PRECISION = float(os.getenv('LOCAL_CLASSIFIER_PRECISION', '0.9'))
+MAX_AGE_DAYS = float(os.getenv('LOCAL_CLASSIFIER_MAX_AGE_DAYS', '7'))
+# 已标注样本少于这个数不训练
+MIN_TRAIN = 200
+MIN_DF = 2
+MAX_FEATURES = 50000
+ALPHA = 0.1
+SECOND_TAG_RATIO = 0.5
+# 参与特征提取的最大字符数
+TEXT_CHARS = 1000
+# 校准阈值时，达标的预测至少要有这么多条，否则不启用本地分类
+MIN_CALIBRATION = 20
+TOKEN_RE = re.compile(r'[a-z0-9]+|[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]+')
+
+
+def tokenize(text):
+    tokens = []
+    for m in TOKEN_RE.findall((text or '')[:TEXT_CHARS].lower()):
+        if m.isascii():
+            if len(m) > 1:
+                tokens.append(m)
+        else:
+            tokens.extend(m)
+            tokens.extend(m[i:i + 2] for i in range(len(m) - 1))
+    return tokens
+
+
+def labeled_prompts(prompts):
+    """可用作训练数据的条目：有 Gemini 给的标签（本地分类的结果不算）"""
+    return [p for p in prompts if p.get('tags') and p.get('tag_source') != 'local']
+
+
+def is_holdout(p):
+    """按 prompt 内容固定地留出 1/5 做校准和评估"""
+    return zlib.crc32(p['prompt'].encode('utf-8')) % 5 == 0
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    e = np.exp(scores)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class LocalClassifier:
+    def __init__(self, vocab, idf, labels, tag_log_prob, tag_prior, qualities, q_log_prob, q_prior,
+                 threshold=1.01, meta=None):
+        self.vocab = list(vocab)
+        self.index = {t: i for i, t in enumerate(self.vocab)}
+        self.idf = idf
+        self.labels = list(labels)
+        self.tag_log_prob = tag_log_prob
+        self.tag_prior = tag_prior
+        self.qualities = list(qualities)
+        self.q_log_prob = q_log_prob
+        self.q_prior = q_prior
+        self.threshold = threshold
+        self.meta = meta or {}
+
+    @staticmethod
+    def _fit_nb(rows, cols, data, n_feats, y):
+        """y 为 (样本数, 类别数) 的权重矩阵，返回 (log P(特征|类), log P(类))"""
+        counts = np.vstack([np.bincount(cols, weights=data * y[rows, c], minlength=n_feats)
+                            for c in range(y.shape[1])]) + ALPHA
+        log_prob = np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+        prior = np.log(y.sum(axis=0) + 1) - np.log(y.sum() + y.shape[1])
+        return log_prob, prior
+
+    @classmethod
+    def fit(cls, prompts):
+        docs = [tokenize(p['prompt']) for p in prompts]
+        df = Counter()
+        for tokens in docs:
+            df.update(set(tokens))
+        vocab = [t for t, n in sorted(df.items(), key=lambda kv: (-kv[1], kv[0])) if n >= MIN_DF][:MAX_FEATURES]
+        n = len(docs)
+        idf = np.log((1 + n) / (1 + np.array([df[t] for t in vocab], dtype=float))) + 1
+        model = cls(vocab, idf, [], None, None, [], None, None)
+        rows, cols, data = model._vectorize(docs)
+
+        model.labels = sorted({t for p in prompts for t in p['tags']})
+        label_index = {t: i for i, t in enumerate(model.labels)}
+        y = np.zeros((n, len(model.labels)))
+        for i, p in enumerate(prompts):
+            for t in p['tags']:
+                y[i, label_index[t]] += 1.0 / len(p['tags'])
+        model.tag_log_prob, model.tag_prior = cls._fit_nb(rows, cols, data, len(vocab), y)
+
+        model.qualities = sorted({int(p.get('quality_score') or 0) for p in prompts})
+        q_index = {q: i for i, q in enumerate(model.qualities)}
+        yq = np.zeros((n, len(model.qualities)))
+        for i, p in enumerate(prompts):
+            yq[i, q_index[int(p.get('quality_score') or 0)]] = 1.0
+        model.q_log_prob, model.q_prior = cls._fit_nb(rows, cols, data, len(vocab), yq)
+        model.meta = {'trained_at': time.time(), 'samples': n}
+        return model
+
+    def _vectorize(self, docs):
+        """返回稀疏矩阵的 (行号, 列号, 权重) 三个数组"""
+        rows, cols, data = [], [], []
+        for r, tokens in enumerate(docs):
+            counts = Counter(self.index[t] for t in tokens if t in self.index)
+            if not counts:
+                continue
+            idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            tf = 1 + np.log(np.fromiter(counts.values(), dtype=float, count=len(counts)))
+            w = tf * self.idf[idx]
+            w /= np.sqrt((w * w).sum())
+            rows.append(np.full(len(idx), r, dtype=np.int64))
+            cols.append(idx)
+            data.append(w)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+
+    @staticmethod
+    def _posterior(rows, cols, data, n_docs, log_prob, prior):
+        scores = np.vstack([np.bincount(rows, weights=data * log_prob[c, cols], minlength=n_docs)
+                            for c in range(log_prob.shape[0])]).T
+        return _softmax(scores + prior)
+
+    def predict(self, texts):
+        """返回每条 prompt 的 {tags, quality_score, confidence}"""
+        if not texts:
+            return []
+        rows, cols, data = self._vectorize([tokenize(t) for t in texts])
+        tag_p = self._posterior(rows, cols, data, len(texts), self.tag_log_prob, self.tag_prior)
+        q_p = self._posterior(rows, cols, data, len(texts), self.q_log_prob, self.q_prior)
+        results = []
+        for i in range(len(texts)):
+            order = np.argsort(-tag_p[i])
+            tags = [self.labels[order[0]]]
+            if len(order) > 1 and tag_p[i, order[1]] >= SECOND_TAG_RATIO * tag_p[i, order[0]]:
+                tags.append(self.labels[order[1]])
+            results.append({
+                'tags': tags,
+                'quality_score': self.qualities[int(q_p[i].argmax())],
+                'confidence': float(tag_p[i, order[0]]),
+            })
+        return results
+
+    def calibrate(self, holdout):
+        """在留出集上找最低的置信度阈值，使阈值以上的主标签准确率 ≥ TARGET_PRECISION"""
+        preds = self.predict([p['prompt'] for p in holdout])
+        pairs = sorted(((r['confidence'], r['tags'][0] in p['tags']) for r, p in zip(preds, holdout)), reverse=True)
+        self.threshold = 1.01
+        correct = 0
+        for k, (conf, ok) in enumerate(pairs, 1):
+            correct += ok
+            if k >= MIN_CALIBRATION and correct / k >= TARGET_PRECISION:
+                self.threshold = conf
+        return preds
+
+    def save(self, model_file=MODEL_FILE):
+        meta = dict(self.meta, labels=self.labels, qualities=self.qualities, threshold=self.threshold)
+        tmp_file = model_file + '.tmp.npz'
+        np.savez_compressed(tmp_file, vocab=np.array(self.vocab), idf=self.idf,
+                            tag_log_prob=self.tag_log_prob, tag_prior=self.tag_prior,
+                            q_log_prob=self.q_log_prob, q_prior=self.q_prior,
+                            meta=np.array(json.dumps(meta, ensure_ascii=False)))
+        os.replace(tmp_file, model_file)
+
+    @classmethod
+    def load(cls, model_file=MODEL_FILE):
+        with np.load(model_file, allow_pickle=False) as f:
+            meta = json.loads(str(f['meta']))
+            return cls(f['vocab'].tolist(), f['idf'], meta['labels'], f['tag_log_prob'], f['tag_prior'],
+                       meta['qualities'], f['q_log_prob'], f['q_prior'], meta['threshold'], meta)
+
+
+def evaluate(model, holdout, preds):
+    """留出集上的各项准确率"""
+    n = len(holdout)
+    report = {
+        'holdout': n,
+        'top1': sum(r['tags'][0] in p['tags'] for r, p in zip(preds, holdout)) / n,
+        'exact': sum(set(r['tags']) == set(p['tags']) for r, p in zip(preds, holdout)) / n,
+        'quality_within_1': sum(abs(r['quality_score'] - int(p.get('quality_score') or 0)) <= 1
+                                for r, p in zip(preds, holdout)) / n,
+        'threshold': model.threshold,
+    }
+    confident = [(r, p) for r, p in zip(preds, holdout) if r['confidence'] >= model.threshold]
+    report['coverage'] = len(confident) / n
+    report['confident_top1'] = (sum(r['tags'][0] in p['tags'] for r, p in confident) / len(confident)
+                                if confident else 0.0)
+    return report
+
+
+def print_report(report):
+    print(f"  留出样本: {report['holdout']}")
+    print(f"  主标签命中: {report['top1']:.1%}")
+    print(f"  标签完全一致: {report['exact']:.1%}")
+    print(f"  quality_score 误差 ≤ 1: {report['quality_within_1']:.1%}")
+    if report['threshold'] > 1:
+        print(f"  ⚠️ 达不到 {TARGET_PRECISION:.0%} 的主标签准确率，本地分类不会单独使用")
+    else:
+        print(f"  置信度阈值: {report['threshold']:.3f}（准确率目标 {TARGET_PRECISION:.0%}）")
+        print(f"  阈值以上: 覆盖 {report['coverage']:.1%}，主标签命中 {report['confident_top1']:.1%}")
+
+
+def train(prompts, save=True, model_file=MODEL_FILE):
+    """留出 1/5 校准阈值并评估，然后用全部样本重新训练、保存。样本不足时返回 None"""
+    labeled = labeled_prompts(prompts)
+    if len(labeled) < MIN_TRAIN:
+        print(f"⚠️ 已分类样本只有 {len(labeled)} 条（至少 {MIN_TRAIN}），不训练本地分类器")
+        return None
+    holdout = [p for p in labeled if is_holdout(p)]
+    model = LocalClassifier.fit([p for p in labeled if not is_holdout(p)])
+    report = evaluate(model, holdout, model.calibrate(holdout))
+    print(f"🧮 本地分类器: {len(labeled)} 条样本, {len(model.labels)} 个标签")
+    print_report(report)
+    if not save:
+        return model
+    final = LocalClassifier.fit(labeled)
+    final.threshold = model.threshold
+    final.meta['report'] = report
+    final.save(model_file)
+    print(f"📁 已保存: {model_file}")
+    return final
+
+
+def load_local_classifier(training_prompts=None, model_file=MODEL_FILE):
+    """
+    读取模型；没有模型或超过 MAX_AGE_DAYS 天时，用 training_prompts()（返回素材库条目）重新训练。
+    没有 numpy 或没有可用模型时返回 None。
+    """
+    if np is None:
+        print("⚠️ 未安装 numpy，跳过本地预分类")
+        return None
+    model = None
+    if os.path.exists(model_file):
+        try:
+            model = LocalClassifier.load(model_file)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 读取本地分类模型失败: {e}")
+    stale = model is None or time.time() - model.meta.get('trained_at', 0) > MAX_AGE_DAYS * 86400
+    if stale and training_prompts is not None:
+        model = train(training_prompts(), model_file=model_file) or model
+    return model
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Train or evaluate the local pre-classifier')
+    parser.add_argument('command', choices=['train', 'eval'],
+                        help='train: calibrate, evaluate and save; eval: report accuracy only')
+    parser.add_argument('--library', help='Labeled prompt_library.json (default: the configured storage backend)')
+    args = parser.parse_args()
+    if np is None:
+        raise SystemExit("❌ 需要先安装 numpy: pip install numpy")
+    if args.library is None and use_sqlite():
+        db = SqliteStore()
+        library_prompts = list(db.iter_prompts())
+        db.close()
+    else:
+        with open(args.library or LIBRARY_FILE, 'r', encoding='utf-8') as f:
+            library_prompts = json.load(f).get('prompts', [])
+    train(library_prompts, save=args.command == 'train')
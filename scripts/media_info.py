@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+推文媒体描述符：采集时在 slim_tweet() 里算一次，提取时直接读取。
+
+media_info = {'v': 版本, 'has_video': bool, 'kind': ..., 'thumbnail': 缩略图 URL}
+kind:
+- video  媒体 URL 含 data/filter_rules.json 中 video_media 组的标记，或媒体对象标明是视频
+- link   没有视频媒体，但正文带 t.co 链接（多为外链视频，同样算有视频）
+- image  只有其他媒体
+- none   没有媒体
+
+版本由 MEDIA_INFO_VERSION 和 video_media 规则决定，对不上时读取方现算。
+旧的 raw 快照和推文存储用 python scripts/media_info.py backfill 补齐；
+run_pipeline 每次合并后调用 backfill_if_stale()，版本变了才会重写。
+
+逐条调用时先用 media_context() 取一次 (标记, 版本) 再传进来，
+不用每条推文都 stat 规则文件、重建标记列表。
+"""
+
+import os
+import re
+import json
+import hashlib
+
+from rule_engine import load_rules
+from raw_io import BASE_DIR, RAW_DIR, list_raw_files, read_raw, split_raw_name, write_raw
+
+# 修改 describe_media 的判断逻辑（包括下面的正则）时加一
+MEDIA_INFO_VERSION = 1
+TCO_LINK_RE = re.compile(r'https://t\.co/\w+')
+# 上次 backfill 时的版本
+STATE_FILE = os.path.join(BASE_DIR, 'data', 'media_info_state.json')
+
+
+def media_context(rules=None):
+    """一次运行内复用的 (video_media 标记, 描述符版本)"""
+    if rules is None:
+        rules = load_rules()
+    markers = tuple(rules.group_patterns('video_media'))
+    joined = '\x00'.join(sorted(markers))
+    version = hashlib.sha1(f'{MEDIA_INFO_VERSION}\x00{joined}'.encode('utf-8')).hexdigest()[:8]
+    return markers, version
+
+
+def media_version():
+    return media_context()[1]
+
+
+def describe_media(tweet, ctx=None):
+    """由 media 列表和正文算出媒体描述符；ctx 为 media_context() 的结果"""
+    markers, version = ctx or media_context()
+    media = tweet.get('media', [])
+    if not isinstance(media, list):
+        media = []
+
+    video = False
+    thumbnail = None
+    for m in media:
+        if isinstance(m, str):
+            if any(k in m.lower() for k in markers):
+                video = True
+                if thumbnail is None:
+                    thumbnail = m
+        elif isinstance(m, dict):
+            if m.get('type') == 'video' or 'video' in str(m.get('url', '')):
+                video = True
+            if thumbnail is None:
+                thumbnail = m.get('thumbnail', m.get('url', ''))
+
+    # 没有明确的视频缩略图时退回任意图片（Twitter 的视频封面常常就是普通图片 URL）
+    if thumbnail is None:
+        thumbnail = next((m for m in media if isinstance(m, str) and m.startswith('http')), '')
+
+    if video:
+        kind = 'video'
+    elif TCO_LINK_RE.search(tweet.get('text', '') or ''):
+        kind = 'link'
+    elif media:
+        kind = 'image'
+    else:
+        kind = 'none'
+
+    return {
+        'v': version,
+        'has_video': kind in ('video', 'link'),
+        'kind': kind,
+        'thumbnail': thumbnail,
+    }
+
+
+def get_media_info(tweet, ctx=None):
+    """优先读取预先算好的描述符，缺失或版本过期时现算"""
+    ctx = ctx or media_context()
+    info = tweet.get('media_info')
+    if isinstance(info, dict) and info.get('v') == ctx[1]:
+        return info
+    return describe_media(tweet, ctx)
+
+
+def fill_media_info(tweet, ctx=None):
+    """补齐或更新推文的 media_info，有改动时返回 True"""
+    ctx = ctx or media_context()
+    info = tweet.get('media_info')
+    if isinstance(info, dict) and info.get('v') == ctx[1]:
+        return False
+    tweet['media_info'] = describe_media(tweet, ctx)
+    return True
+
+
+def backfill_raw(raw_dir=RAW_DIR):
+    """给已有 raw 快照补上 media_info，保持原格式；已合并过的文件同步更新 manifest"""
+    from merge_dedup import file_sha256, load_manifest, save_manifest
+
+    ctx = media_context()
+    manifest = load_manifest()
+    rewritten = 0
+    for path in list_raw_files(raw_dir):
+        tweets = read_raw(path)
+        changed = [fill_media_info(t, ctx) for t in tweets]
+        if not any(changed):
+            continue
+        rel = os.path.relpath(path, BASE_DIR)
+        entry = manifest.get(rel)
+        merged = entry is not None and entry.get('sha256') == file_sha256(path)
+
+        stem, fmt = split_raw_name(path)
+        new_path = write_raw(stem, tweets, raw_dir, fmt)
+        if merged:
+            st = os.stat(new_path)
+            manifest[rel] = dict(entry, size=st.st_size, mtime=st.st_mtime, sha256=file_sha256(new_path))
+        rewritten += 1
+        print(f"  📄 {os.path.basename(path)}: 补齐 {sum(changed)} 条")
+    save_manifest(manifest)
+    return rewritten
+
+
+def backfill_store():
+    """给推文存储中的推文补上 media_info"""
+    from sqlite_store import open_tweet_store
+
+    ctx = media_context()
+    store = open_tweet_store()
+    try:
+        return store.rewrite(lambda t: fill_media_info(t, ctx))
+    finally:
+        if hasattr(store, 'close'):
+            store.close()
+
+
+def backfill_if_stale(force=False):
+    """描述符版本和上次 backfill 时不同才补齐（首次运行、改了 video_media 规则之后）"""
+    version = media_version()
+    if not force and os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                if json.load(f).get('version') == version:
+                    return False
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ 读取 media_info 状态失败，重新补齐: {e}")
+
+    print(f"🎞️  media_info 版本 {version}，补齐已有数据...")
+    files = backfill_raw()
+    count = backfill_store()
+    print(f"✅ raw 快照改写 {files} 个文件，推文存储补齐 {count} 条")
+
+    tmp_file = STATE_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': version}, f)
+    os.replace(tmp_file, STATE_FILE)
+    return True
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Media descriptor utilities')
+    parser.add_argument('command', choices=['backfill'], help='backfill: add media_info to existing raw files and the tweet store')
+    args = parser.parse_args()
+    if args.command == 'backfill':
+        backfill_if_stale(force=True)
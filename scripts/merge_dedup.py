@@ -1,66 +1,241 @@
 #!/usr/bin/env python3
 """
-合并 data/raw/*.json 中的所有推文数据，按 tweet ID 去重。
-输出 data/all_tweets.json
+合并 data/raw/ 中的所有推文快照（.json 或压缩的 .jsonl.gz / .jsonl.zst），按 tweet ID 去重。
+写入追加式推文存储 data/tweets/（见 tweet_store.py），
+可选导出兼容旧格式的 data/all_tweets.json。
+
+增量合并：data/raw_manifest.json 记录已处理的 raw 文件
+(path, size, mtime, sha256, count)，每次只解析新增或内容有变化的文件。
+黑名单（blacklist.py）中的推文在这里就被过滤，不会进入存储。
+从黑名单里删掉一条不会让它自动回来（它所在的 raw 文件没变，不会重新解析），
+需要 --full 重跑；知道日期时加 --since / --until 只重新解析那几天的文件。
+--since / --until 只处理可能包含该日期范围推文的 raw 文件（按月分段依据 raw_segments.json 跳过），
+例如 --full --since 2026-03-01 --until 2026-03-31 只重新解析三月的数据。
 """
 
 import os
 import json
-import glob
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from tweet_store import TweetStore, LEGACY_FILE, tweet_key
+from sqlite_store import open_tweet_store, use_sqlite
+from raw_io import list_raw_files, read_raw, select_raw_files
+from blacklist import load_blacklist
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FILE = os.path.join(BASE_DIR, 'data', 'raw_manifest.json')
 
 
-def merge_and_dedup():
-    """合并所有原始数据文件并去重"""
-    raw_dir = os.path.join(BASE_DIR, 'data', 'raw')
-    output_file = os.path.join(BASE_DIR, 'data', 'all_tweets.json')
+def file_sha256(path):
+    """分块计算文件内容哈希"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
-    # 读取现有合并数据
-    existing = {}
-    if os.path.exists(output_file):
-        with open(output_file, 'r', encoding='utf-8') as f:
-            for tweet in json.load(f):
-                tid = tweet.get('id') or tweet.get('url', '')
-                if tid:
-                    existing[tid] = tweet
 
-    print(f"📂 现有数据: {len(existing)} 条")
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """读取已处理 raw 文件清单，格式异常时视为空"""
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get('files', {})
+    except (json.JSONDecodeError, OSError, AttributeError) as e:
+        print(f"⚠️ 读取 manifest 失败，将全量合并: {e}")
+        return {}
 
-    # 读取所有 raw 文件
-    raw_files = sorted(glob.glob(os.path.join(raw_dir, '*.json')))
-    new_count = 0
 
+def save_manifest(files, manifest_file=MANIFEST_FILE):
+    """原子写入 manifest"""
+    tmp_file = manifest_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'files': files}, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+
+def changed_raw_files(raw_files, manifest):
+    """
+    对比 manifest 找出需要重新解析的 raw 文件。
+    size/mtime 未变直接跳过；变了再比对内容哈希，避免 touch/checkout 触发重解析。
+    返回 (待解析 [(path, rel, stat, sha)], 更新后的 manifest)，
+    manifest 中没有记录的文件 sha 为 None，留到解析时计算。
+    """
+    pending = []
+    files = {}
     for fpath in raw_files:
-        fname = os.path.basename(fpath)
-        with open(fpath, 'r', encoding='utf-8') as f:
-            tweets = json.load(f)
+        rel = os.path.relpath(fpath, BASE_DIR)
+        st = os.stat(fpath)
+        entry = manifest.get(rel)
+        if not entry:
+            pending.append((fpath, rel, st, None))
+            continue
+        if entry.get('size') == st.st_size and entry.get('mtime') == st.st_mtime:
+            files[rel] = entry
+            continue
+        sha = file_sha256(fpath)
+        if entry.get('sha256') == sha:
+            files[rel] = dict(entry, size=st.st_size, mtime=st.st_mtime)
+            continue
+        pending.append((fpath, rel, st, sha))
+    return pending, files
+
+
+def load_raw_file(fpath, sha=None, known=(), blacklist=None):
+    """
+    解析单个 raw 文件，只保留未被拉黑、不在 known 中、文件内首次出现的推文。
+    返回 (保留的推文, 文件总条数, 拉黑条数, 内容哈希)。可在子进程中运行
+    """
+    if sha is None:
+        sha = file_sha256(fpath)
+    tweets = read_raw(fpath)
+    kept = []
+    seen = set()
+    blocked = 0
+    for tweet in tweets:
+        if blacklist is not None and blacklist.is_blocked(tweet):
+            blocked += 1
+            continue
+        tid = tweet_key(tweet)
+        if not tid or tid in seen or tid in known:
+            continue
+        seen.add(tid)
+        kept.append(tweet)
+    return kept, len(tweets), blocked, sha
+
+
+# 子进程里的已有 id 和黑名单，由 _init_worker 在进程启动时设置一次
+_known = ()
+_blacklist = None
+
+
+def _init_worker(known, blacklist):
+    global _known, _blacklist
+    _known, _blacklist = known, blacklist
+
+
+def _load_raw_job(job):
+    fpath, sha = job
+    return load_raw_file(fpath, sha, _known, _blacklist)
 
-        file_new = 0
-        for tweet in tweets:
-            tid = tweet.get('id') or tweet.get('url', '')
-            if tid and tid not in existing:
-                existing[tid] = tweet
-                file_new += 1
-                new_count += 1
 
-        print(f"  📄 {fname}: {len(tweets)} 条, 新增 {file_new}")
+def iter_parsed(pending, workers=1, known=(), blacklist=None):
+    """
+    按 pending 顺序产出 (fpath, rel, stat, 保留的推文, 总条数, 拉黑条数, sha)。
+    workers > 1 时在进程池中并行解析，子进程先去掉已在存储中（known）、被拉黑和文件内重复的推文，
+    只把剩下的传回主进程；结果仍按文件顺序归并，"先到先得" 的去重结果与单进程一致，不受调度影响。
+    """
+    if workers <= 1 or len(pending) <= 1:
+        # 单进程时已有 id 由存储的 append_many 自己跳过
+        for fpath, rel, st, sha in pending:
+            yield (fpath, rel, st) + load_raw_file(fpath, sha, blacklist=blacklist)
+        return
+
+    # 分窗口提交，避免解析结果在主进程中堆积
+    window = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(known, blacklist)) as pool:
+        for start in range(0, len(pending), window):
+            chunk = pending[start:start + window]
+            results = pool.map(_load_raw_job, [(fpath, sha) for fpath, _, _, sha in chunk])
+            for (fpath, rel, st, _), result in zip(chunk, results):
+                yield (fpath, rel, st) + result
+
+
+def merge_and_dedup(full=False, export_json=False, workers=1, since=None, until=None):
+    """
+    合并原始数据文件并去重（默认只处理新增/变更的 raw 文件，workers > 1 时并行解析）。
+    since / until（YYYY-MM-DD）给出时只看这个日期范围内的 raw 文件，范围外文件的 manifest 记录保持不变。
+    """
+    store = open_tweet_store()
+    blacklist = load_blacklist()
+    if len(blacklist):
+        print(f"🚫 加载黑名单: {len(blacklist)} 条")
+
+    # 首次运行时从已有存储迁移：SQLite 后端优先取 data/tweets/，其次旧的 all_tweets.json
+    if not len(store):
+        if use_sqlite() and len(TweetStore()):
+            migrated = store.append_many(t for t in TweetStore().iter_sorted() if not blacklist.is_blocked(t))
+            print(f"📦 从 data/tweets/ 迁移: {migrated} 条")
+        elif os.path.exists(LEGACY_FILE):
+            with open(LEGACY_FILE, 'r', encoding='utf-8') as f:
+                migrated = store.append_many(t for t in json.load(f) if not blacklist.is_blocked(t))
+            print(f"📦 从 {LEGACY_FILE} 迁移: {migrated} 条")
+
+    print(f"📂 现有数据: {len(store)} 条")
+
+    # 存储为空时，manifest 记录的进度也就失效了
+    manifest = load_manifest() if len(store) else {}
+
+    windowed = bool(since or until)
+    if windowed:
+        raw_files = select_raw_files(since, until)
+        print(f"  📅 日期范围 {since or '...'} ~ {until or '...'}: {len(raw_files)}/{len(list_raw_files())} 个 raw 文件")
+    else:
+        raw_files = list_raw_files()
+    selected = {os.path.relpath(p, BASE_DIR) for p in raw_files}
+    if full:
+        # 只忘掉本次选中的文件
+        manifest = {rel: e for rel, e in manifest.items() if rel not in selected}
+
+    # 只读取新增或变更的 raw 文件
+    pending, files = changed_raw_files(raw_files, manifest)
+    if windowed:
+        files.update({rel: e for rel, e in manifest.items()
+                      if rel not in selected and os.path.exists(os.path.join(BASE_DIR, rel))})
+    skipped = len(raw_files) - len(pending)
+    if skipped:
+        print(f"  ⏭️  跳过未变更文件: {skipped} 个")
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    known = ()
+    if workers > 1 and len(pending) > 1:
+        print(f"  ⚙️  并行解析: {len(pending)} 个文件, {workers} 个进程")
+        known = store.ids()
+
+    new_count = 0
+    blocked = 0
+    for fpath, rel, st, tweets, total, file_blocked, sha in iter_parsed(pending, workers, known, blacklist):
+        fname = os.path.basename(fpath)
+        blocked += file_blocked
+        file_new = store.append_many(tweets)
+        new_count += file_new
+
+        files[rel] = {
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'sha256': sha,
+            'count': total,
+        }
+        print(f"  📄 {fname}: {total} 条, 新增 {file_new}")
 
-    # 按时间排序（最新在前）
-    all_tweets = sorted(
-        existing.values(),
-        key=lambda x: x.get('createdAt', ''),
-        reverse=True
-    )
+    # 推文先落盘，再写 manifest，中断时最多重复解析一次（重复 id 会被跳过）
+    save_manifest(files)
 
-    # 保存
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_tweets, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 合并完成: {store.root}")
+    print(f"   总计: {len(store)} 条, 本次新增: {new_count}")
+    if blocked:
+        print(f"   🚫 黑名单拦截: {blocked} 条")
 
-    print(f"\n✅ 合并完成: {output_file}")
-    print(f"   总计: {len(all_tweets)} 条, 本次新增: {new_count}")
-    return output_file
+    if export_json:
+        count = store.export_json()
+        print(f"📤 已导出: {LEGACY_FILE} ({count} 条)")
+    return store.root
 
 
 if __name__ == '__main__':
-    merge_and_dedup()
+    import argparse
+    parser = argparse.ArgumentParser(description='Merge and dedup raw tweet files')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore the manifest and re-parse every raw file (needed after removing entries from '
+                             'data/blacklist.txt; combine with --since/--until to limit it to those dates)')
+    parser.add_argument('--export-json', action='store_true', help='Also export data/all_tweets.json')
+    parser.add_argument('--workers', type=int, default=1, help='Processes for parsing raw files (0 = all cores)')
+    parser.add_argument('--since', help='Only raw files that may hold tweets on/after YYYY-MM-DD')
+    parser.add_argument('--until', help='Only raw files that may hold tweets on/before YYYY-MM-DD')
+    args = parser.parse_args()
+    merge_and_dedup(full=args.full, export_json=args.export_json, workers=args.workers,
+                    since=args.since, until=args.until)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+prompt 近似去重：字符 shingle + MinHash 签名 + LSH 分桶。
+
+- prompt 归一化（小写、去标点、合并空白，不截断）后切成 SHINGLE_SIZE 个字符的 shingle，
+  中英文都适用
+- 签名用 one-permutation MinHash：每个 shingle 只哈希一次，按哈希高位落入 NUM_PERM 个桶之一、
+  桶内取最小值，空桶向右借最近的非空桶（densification）。代价与 prompt 长度线性相关
+- 签名切成 band，同一 band 值相同的 prompt 互为候选，签名相似度 ≥ threshold 才合并
+- 并查集得到近似重复簇
+
+全程没有两两比较，整个素材库的耗时与 prompt 总长度大致成正比。
+"""
+
+import os
+import re
+import zlib
+from collections import defaultdict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+# 签名相似度（≈ shingle 集合的 Jaccard）达到该值视为近似重复；≥ 1 时只合并归一化后完全相同的 prompt
+DEFAULT_THRESHOLD = float(os.getenv('NEAR_DUP_THRESHOLD', '0.8'))
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+_BIN_BITS = NUM_PERM.bit_length() - 1
+_VALUE_BITS = 64 - _BIN_BITS
+_EMPTY = 1 << _VALUE_BITS
+NON_WORD_RE = re.compile(r'[^\w\s]')
+SPACES_RE = re.compile(r'\s+')
+
+
+def canonical_text(text):
+    """完整归一化（不截断），用于 shingle 和精确去重"""
+    norm = NON_WORD_RE.sub('', (text or '').lower())
+    return SPACES_RE.sub(' ', norm).strip()
+
+
+def shingles(norm, k=SHINGLE_SIZE):
+    if len(norm) <= k:
+        return {norm} if norm else set()
+    return {norm[i:i + k] for i in range(len(norm) - k + 1)}
+
+
+def signature(shingle_set):
+    """one-permutation MinHash 签名，空集合返回 None"""
+    if not shingle_set:
+        return None
+    bins = [_EMPTY] * NUM_PERM
+    for s in shingle_set:
+        # crc32 再乘黄金比例常数打散，高位选桶、低位作值
+        h = (zlib.crc32(s.encode('utf-8')) * _GOLDEN) & _MASK64
+        b = h >> _VALUE_BITS
+        v = h & (_EMPTY - 1)
+        if v < bins[b]:
+            bins[b] = v
+    # densification：空桶取右侧最近非空桶的值，并按距离加偏移区分来源
+    sig = list(bins)
+    for i in range(NUM_PERM):
+        if bins[i] != _EMPTY:
+            continue
+        for d in range(1, NUM_PERM):
+            v = bins[(i + d) % NUM_PERM]
+            if v != _EMPTY:
+                sig[i] = v + d * _EMPTY
+                break
+    return sig
+
+
+def similarity(a, b):
+    """签名相同位置的比例，是 Jaccard 相似度的估计"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def lsh_params(threshold):
+    """
+    选 (bands, rows)：候选阈值 (1/bands)^(1/rows) 落在 threshold 以下，宁可多出候选再用签名相似度过滤，
+    也不漏掉真正的近似重复
+    """
+    best = (NUM_PERM, 1)
+    for rows in range(1, NUM_PERM + 1):
+        if NUM_PERM % rows:
+            continue
+        bands = NUM_PERM // rows
+        if (1 / bands) ** (1 / rows) <= threshold * 0.85:
+            best = (bands, rows)
+    return best
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        # 较小的下标做根，簇的顺序与输入顺序一致
+        if rb < ra:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        return True
+
+
+def cluster_near_duplicates(texts, threshold=None):
+    """
+    返回近似重复簇 [[下标, ...], ...]。
+    簇按首个成员的下标排序，簇内下标升序，结果只取决于输入，与运行环境无关。
+    """
+    threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+    uf = _UnionFind(len(texts))
+
+    # 归一化后完全相同的直接合并
+    norms = [canonical_text(t) for t in texts]
+    first = {}
+    for i, norm in enumerate(norms):
+        if norm in first:
+            uf.union(first[norm], i)
+        else:
+            first[norm] = i
+
+    if threshold < 1:
+        # 每个不同的归一化文本只算一次签名
+        sigs = {i: signature(shingles(norms[i])) for i in first.values()}
+        bands, rows = lsh_params(threshold)
+        for band in range(bands):
+            lo, hi = band * rows, (band + 1) * rows
+            buckets = defaultdict(list)
+            for i, sig in sigs.items():
+                if sig is not None:
+                    buckets[tuple(sig[lo:hi])].append(i)
+            for members in buckets.values():
+                # 同桶成员只与桶首和前一个比较，避免大桶退化成两两比较
+                for j in range(1, len(members)):
+                    cur = members[j]
+                    for other in (members[0], members[j - 1]):
+                        if uf.find(other) != uf.find(cur) and similarity(sigs[other], sigs[cur]) >= threshold:
+                            uf.union(other, cur)
+
+    clusters = defaultdict(list)
+    for i in range(len(texts)):
+        clusters[uf.find(i)].append(i)
+    return [clusters[root] for root in sorted(clusters)]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+线程安全的令牌桶限流，用于并发调用 Gemini。
+
+- 两个桶：每分钟请求数 (RPM) 和每分钟 token 数 (TPM)，每次请求同时从两个桶取
+- 收到 429 时 backoff()：所有线程暂停到 Retry-After 指定的时间，并把速率减半；
+  之后每次成功 success() 逐步恢复到配置的速率（乘性减、加性增）
+"""
+
+import time
+import threading
+
+MIN_RATE_FACTOR = 0.1
+RECOVER_STEP = 0.05
+
+
+class TokenBucket:
+    """容量为每分钟配额、按速率连续补充的令牌桶"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now, factor=1.0):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60 * factor)
+        self.updated = now
+
+    def wait_time(self, amount, factor=1.0):
+        """还需要等多少秒才够 amount 个令牌"""
+        amount = min(amount, self.capacity)
+        missing = amount - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / (self.capacity / 60 * factor)
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.factor = 1.0
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.throttled = 0
+
+    def acquire(self, tokens=0):
+        """阻塞到 RPM 和 TPM 都有余量，然后扣除一次请求和 tokens 个 token"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    self.requests.refill(now, self.factor)
+                    self.tokens.refill(now, self.factor)
+                    wait = max(self.requests.wait_time(1, self.factor),
+                               self.tokens.wait_time(tokens, self.factor))
+                    if wait <= 0:
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        return
+            time.sleep(min(wait, 5))
+
+    def backoff(self, delay):
+        """被限流：全体暂停 delay 秒，速率减半"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.factor = max(MIN_RATE_FACTOR, self.factor * 0.5)
+            self.throttled += 1
+
+    def success(self):
+        with self.lock:
+            self.factor = min(1.0, self.factor + RECOVER_STEP)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+data/raw 快照的读写。
+
+新快照写为压缩的 JSON Lines（默认 gzip，RAW_FORMAT=zst 且安装了 zstandard 时用 zstd），
+读取时根据后缀透明处理旧的 .json 与 .jsonl / .jsonl.gz / .jsonl.zst。
+
+一次性转换已有归档：python scripts/raw_io.py convert [--format gz|zst]
+"""
+
+import os
+import io
+import re
+import json
+import gzip
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(BASE_DIR, 'data', 'raw')
+# compact_raw 写入的按月分段索引（日期范围、id 范围）
+SEGMENT_INDEX_FILE = os.path.join(BASE_DIR, 'data', 'raw_segments.json')
+DAILY_STEM = re.compile(r'^(\d{4}-\d{2})-\d{2}$')
+
+# 后缀 → 格式名；长后缀在前，保证 .jsonl.gz 不会被当成 .jsonl
+RAW_SUFFIXES = (
+    ('.jsonl.zst', 'zst'),
+    ('.jsonl.gz', 'gz'),
+    ('.jsonl', 'jsonl'),
+    ('.json', 'json'),
+)
+FORMAT_SUFFIX = {fmt: suffix for suffix, fmt in RAW_SUFFIXES}
+
+
+def raw_format():
+    """新快照的写入格式，zstd 不可用时退回 gzip"""
+    fmt = os.getenv('RAW_FORMAT', 'gz').lower()
+    if fmt not in FORMAT_SUFFIX:
+        raise ValueError(f"未知的 RAW_FORMAT: {fmt}")
+    if fmt == 'zst' and zstandard is None:
+        print("⚠️ 未安装 zstandard，改用 gzip")
+        return 'gz'
+    return fmt
+
+
+def split_raw_name(path):
+    """返回 (stem, 格式)，不是 raw 快照时返回 (None, None)"""
+    name = os.path.basename(path)
+    for suffix, fmt in RAW_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)], fmt
+    return None, None
+
+
+def list_raw_files(raw_dir=RAW_DIR):
+    """列出所有 raw 快照，按 (日期 stem, 文件名) 排序"""
+    if not os.path.isdir(raw_dir):
+        return []
+    files = []
+    for name in os.listdir(raw_dir):
+        stem, fmt = split_raw_name(name)
+        if stem is not None:
+            files.append((stem, name))
+    return [os.path.join(raw_dir, name) for _, name in sorted(files)]
+
+
+def load_segment_index(index_file=SEGMENT_INDEX_FILE):
+    if not os.path.exists(index_file):
+        return {}
+    with open(index_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def id_order(tid):
+    """数字 id 按数值比较，非数字 id（url 兜底）排在最后"""
+    return (0, int(tid), '') if tid.isdigit() else (1, 0, tid)
+
+
+def select_raw_files(since=None, until=None, newer_than_id=None, raw_dir=RAW_DIR):
+    """
+    列出可能包含 [since, until] 日期范围（YYYY-MM-DD）或比 newer_than_id 更新的推文的 raw 文件。
+    按月分段依据 raw_segments.json 判断；每日快照只按文件名日期粗筛（快照覆盖的是从该日起的窗口）。
+    """
+    index = load_segment_index()
+    selected = []
+    for path in list_raw_files(raw_dir):
+        name = os.path.basename(path)
+        stem, _ = split_raw_name(name)
+        meta = index.get(name)
+        if meta is None:
+            if until and DAILY_STEM.match(stem) and stem > until:
+                continue
+            selected.append(path)
+            continue
+        if since and meta['date_max'] and meta['date_max'] < since:
+            continue
+        if until and meta['date_min'] and meta['date_min'] > until:
+            continue
+        if newer_than_id and meta['id_max'] and id_order(meta['id_max']) <= id_order(newer_than_id):
+            continue
+        selected.append(path)
+    return selected
+
+
+def _open_reader(path, fmt):
+    if fmt == 'gz':
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if fmt == 'zst':
+        if zstandard is None:
+            raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def encode_raw(tweets, fmt):
+    """序列化为目标格式的字节"""
+    if fmt == 'json':
+        return json.dumps(list(tweets), ensure_ascii=False, indent=2).encode('utf-8')
+    data = ''.join(json.dumps(t, ensure_ascii=False) + '\n' for t in tweets).encode('utf-8')
+    if fmt == 'gz':
+        # mtime=0，相同内容产生相同字节，避免无意义的 git diff
+        return gzip.compress(data, mtime=0)
+    if fmt == 'zst':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return data
+
+
+def iter_raw(path):
+    """流式读取一个 raw 快照中的推文"""
+    _, fmt = split_raw_name(path)
+    if fmt == 'json':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+    with _open_reader(path, fmt) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_raw(path):
+    """读取一个 raw 快照为列表"""
+    return list(iter_raw(path))
+
+
+def write_raw(stem, tweets, raw_dir=RAW_DIR, fmt=None):
+    """
+    写入 raw 快照 <raw_dir>/<stem><suffix>，先写临时文件再替换。
+    同一 stem 的其他格式文件会被删除，避免同一天的数据被读两遍。
+    返回写入的文件路径。
+    """
+    fmt = fmt or raw_format()
+    if fmt == 'zst' and zstandard is None:
+        raise RuntimeError("写入 zstd 快照需要安装 zstandard")
+    os.makedirs(raw_dir, exist_ok=True)
+    path = os.path.join(raw_dir, stem + FORMAT_SUFFIX[fmt])
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(encode_raw(tweets, fmt))
+    os.replace(tmp_path, path)
+
+    for suffix, other in RAW_SUFFIXES:
+        sibling = os.path.join(raw_dir, stem + suffix)
+        if other != fmt and os.path.exists(sibling):
+            os.remove(sibling)
+    return path
+
+
+def convert_archive(raw_dir=RAW_DIR, fmt=None):
+    """把已有快照转换为指定格式（默认 RAW_FORMAT），原文件被替换"""
+    fmt = fmt or raw_format()
+    before = after = converted = 0
+    for path in list_raw_files(raw_dir):
+        stem, old_fmt = split_raw_name(path)
+        if old_fmt == fmt:
+            continue
+        size = os.path.getsize(path)
+        new_path = write_raw(stem, read_raw(path), raw_dir, fmt)
+        new_size = os.path.getsize(new_path)
+        before += size
+        after += new_size
+        converted += 1
+        print(f"  📄 {os.path.basename(path)} → {os.path.basename(new_path)}: "
+              f"{size / 1024:.0f} KB → {new_size / 1024:.0f} KB")
+    print(f"✅ 转换完成: {converted} 个文件, {before / 1048576:.1f} MB → {after / 1048576:.1f} MB")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Raw snapshot utilities')
+    sub = parser.add_subparsers(dest='command', required=True)
+    conv = sub.add_parser('convert', help='Convert the existing raw archive to compressed JSON Lines')
+    conv.add_argument('--format', choices=sorted(FORMAT_SUFFIX), help='Target format (default: $RAW_FORMAT or gz)')
+    args = parser.parse_args()
+    if args.command == 'convert':
+        convert_archive(fmt=args.format)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+推文过滤规则引擎：所有子串类规则编译成一个 Aho-Corasick 自动机，每条推文只扫描一遍。
+
+规则在 data/filter_rules.json（与 blacklist.txt 同目录）：
+- groups: 规则组，field 指定匹配的字段，min_hits 为触发该组需要命中的不同规则数
+    text   推文正文（忽略大小写的子串）
+    author 作者 userName（忽略大小写的完整匹配）
+    media  任意一个媒体 URL（忽略大小写的子串）
+- rules:  [{"id", "group", "pattern"}]
+
+推文被拼成「作者 | 媒体 | 正文」一个字符串扫描，匹配按结束位置归属字段，
+所以规则再多，每条推文的扫描代价也只和文本长度有关。
+"""
+
+import os
+import json
+import hashlib
+from collections import Counter, deque
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES_FILE = os.path.join(BASE_DIR, 'data', 'filter_rules.json')
+
+FIELDS = ('author', 'media', 'text')
+# 作者字段用分隔符包起来，把完整匹配变成子串匹配；媒体 URL 之间用 \x00 隔开
+AUTHOR_OPEN, AUTHOR_CLOSE, MEDIA_SEP = '\x01', '\x02', '\x00'
+
+
+class AhoCorasick:
+    """多模式子串匹配，转移表预先补全为 DFA，扫描时每个字符一次字典查找"""
+
+    def __init__(self, patterns):
+        # patterns: [(pattern, value)]
+        self.delta = [{}]
+        self.out = [()]
+        for pattern, value in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = self.delta[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.delta)
+                    self.delta[state][ch] = nxt
+                    self.delta.append({})
+                    self.out.append(())
+                state = nxt
+            self.out[state] += (value,)
+        self._build()
+
+    def _build(self):
+        fail = [0] * len(self.delta)
+        root = dict(self.delta[0])
+        queue = deque(root.values())
+        while queue:
+            state = queue.popleft()
+            self.out[state] += self.out[fail[state]]
+            # 先记下 trie 自身的边，再用失败状态的转移补全
+            children = list(self.delta[state].items())
+            for ch, nxt in children:
+                f = fail[state]
+                fail[nxt] = self.delta[f].get(ch, 0) if state else 0
+                queue.append(nxt)
+            full = dict(self.delta[fail[state]]) if state else {}
+            full.update(self.delta[state])
+            self.delta[state] = full
+        # 根状态的缺省转移就是留在根，不需要补全
+        self.delta[0] = root
+
+    def iter_matches(self, text):
+        """产出 (结束位置, value)"""
+        delta, out = self.delta, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            # 补全后的转移表里没有的字符一律回到根
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for value in out[state]:
+                    yield i, value
+
+
+class RuleEngine:
+    def __init__(self, config):
+        self.groups = config.get('groups', {})
+        self.rules = {r['id']: r for r in config.get('rules', [])}
+        self.hits = Counter()
+        self.fingerprint = hashlib.sha1(
+            json.dumps(config, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+        patterns = []
+        for rule in self.rules.values():
+            field = self.groups[rule['group']]['field']
+            if field not in FIELDS:
+                raise ValueError(f"规则 {rule['id']} 的字段未知: {field}")
+            pattern = rule['pattern'].lower()
+            if not pattern:
+                raise ValueError(f"规则 {rule['id']} 的 pattern 为空")
+            if field == 'author':
+                pattern = AUTHOR_OPEN + pattern + AUTHOR_CLOSE
+            patterns.append((pattern, (rule['id'], field)))
+        self.automaton = AhoCorasick(patterns)
+
+    def scan(self, tweet):
+        """扫描一条推文，返回命中的规则 id（排序去重），并累加命中计数"""
+        author = tweet.get('author', {})
+        user = author.get('userName', '') if isinstance(author, dict) else ''
+        media = tweet.get('media', [])
+        media_urls = [m for m in media if isinstance(m, str)] if isinstance(media, list) else []
+
+        # 分段转小写再拼接：个别字符转小写后长度会变，先拼后转会让字段边界错位
+        author_part = (AUTHOR_OPEN + (user or '') + AUTHOR_CLOSE).lower()
+        media_part = (MEDIA_SEP.join(media_urls) + MEDIA_SEP).lower()
+        doc = author_part + media_part + (tweet.get('text', '') or '').lower()
+        # 各字段在 doc 中的结束位置（不含）
+        bounds = (len(author_part), len(author_part) + len(media_part), len(doc))
+
+        matched = set()
+        for end, (rule_id, field) in self.automaton.iter_matches(doc):
+            idx = 0 if end < bounds[0] else 1 if end < bounds[1] else 2
+            if FIELDS[idx] == field:
+                matched.add(rule_id)
+        matched = sorted(matched)
+        self.hits.update(matched)
+        return matched
+
+    def group_patterns(self, group):
+        """某个规则组的全部 pattern（小写）"""
+        return [r['pattern'].lower() for r in self.rules.values() if r['group'] == group]
+
+    def triggered(self, matched):
+        """命中规则数达到 min_hits 的规则组"""
+        per_group = Counter(self.rules[r]['group'] for r in matched if r in self.rules)
+        return {g for g, n in per_group.items() if n >= self.groups[g].get('min_hits', 1)}
+
+
+_engines = {}
+
+
+def load_rules(rules_file=RULES_FILE):
+    """读取规则文件，按 mtime 缓存编译好的引擎"""
+    mtime = os.path.getmtime(rules_file)
+    cached = _engines.get(rules_file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        engine = RuleEngine(json.load(f))
+    _engines[rules_file] = (mtime, engine)
+    return engine
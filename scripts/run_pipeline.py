@@ -13,13 +13,17 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from fetch_tweets import fetch_tweets
 from merge_dedup import merge_and_dedup
+from compact_raw import compact_raw
+from media_info import backfill_if_stale
 from extract_prompts import extract_prompts
 from classify_prompts import classify_prompts
 from generate_site import generate_site
+from sqlite_store import export_all, use_sqlite
 
 
-def run_pipeline(skip_fetch=False, skip_classify=False, days_back=1, max_items=4000):
-    """运行完整 pipeline"""
+def run_pipeline(skip_fetch=False, skip_classify=False, days_back=1, max_items=4000, use_watermark=True,
+                 compact=False):
+    """运行完整 pipeline；compact 时合并前先把已结束月份的每日 raw 快照压实（见 compact_raw.py）"""
     print("=" * 60)
     print("🚀 Seedance Prompt Library Pipeline")
     print("=" * 60)
@@ -29,7 +33,7 @@ def run_pipeline(skip_fetch=False, skip_classify=False, days_back=1, max_items=4
         print("\n" + "=" * 60)
         print("📡 Step 1/5: 采集推文")
         print("=" * 60)
-        fetch_tweets(days_back=days_back, max_items=max_items)
+        fetch_tweets(days_back=days_back, max_items=max_items, use_watermark=use_watermark)
     else:
         print("\n⏭️  跳过采集步骤")
 
@@ -37,7 +41,12 @@ def run_pipeline(skip_fetch=False, skip_classify=False, days_back=1, max_items=4
     print("\n" + "=" * 60)
     print("🔄 Step 2/5: 合并去重")
     print("=" * 60)
+    # 压实会删除每日快照、改写成按月的 .jsonl.gz，改动很大，只在显式要求时做
+    if compact:
+        compact_raw()
     merge_and_dedup()
+    # 改了 video_media 规则（或首次升级）后给已有数据补齐 media_info，平时直接跳过
+    backfill_if_stale()
 
     # Step 3: 提取 prompt
     print("\n" + "=" * 60)
@@ -60,6 +69,11 @@ def run_pipeline(skip_fetch=False, skip_classify=False, days_back=1, max_items=4
     print("=" * 60)
     generate_site()
 
+    # SQLite 后端：JSON 文件作为导出产物保留
+    if use_sqlite():
+        print("\n📤 从数据库导出 JSON 产物")
+        export_all()
+
     print("\n" + "=" * 60)
     print("✅ Pipeline 完成！")
     print("=" * 60)
@@ -71,11 +85,21 @@ if __name__ == '__main__':
     parser.add_argument('--skip-classify', action='store_true', help='Skip Gemini classification')
     parser.add_argument('--days', type=int, default=1, help='Days back to fetch')
     parser.add_argument('--max', type=int, default=4000, help='Max tweets to fetch')
+    parser.add_argument('--no-watermark', action='store_true', help='Fetch the full --days window instead of resuming from the high-water mark')
+    parser.add_argument('--compact', action='store_true',
+                        help='Compact finished months of daily raw snapshots into monthly .jsonl.gz segments first '
+                             '(deletes the daily files)')
+    parser.add_argument('--backend', choices=['json', 'sqlite'], help='Storage backend (default: $STORAGE_BACKEND or json)')
     args = parser.parse_args()
 
+    if args.backend:
+        os.environ['STORAGE_BACKEND'] = args.backend
+
     run_pipeline(
         skip_fetch=args.skip_fetch,
         skip_classify=args.skip_classify,
         days_back=args.days,
         max_items=args.max,
+        use_watermark=not args.no_watermark,
+        compact=args.compact,
     )
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+可选的 SQLite 存储后端（STORAGE_BACKEND=sqlite 启用）。
+
+- tweets:      以 tweet id 为主键，索引 created_ts / likes / lang
+- prompts:     以归一化 prompt 的哈希为主键，索引 created_ts / likes / engagement_score / lang
+- prompt_tags: prompt 标签，索引 tag
+- meta:        prompt_library 的 metadata 等
+
+各阶段只读写自己涉及的行；data/all_tweets.json 和 data/prompt_library.json
+作为导出产物由 export_json() 从数据库生成。
+
+用法：python scripts/sqlite_store.py export
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+from dotenv import load_dotenv
+
+from tweet_store import LEGACY_FILE, TweetStore, tweet_key, created_ts
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILE = os.path.join(BASE_DIR, 'data', 'seedance.db')
+LIBRARY_FILE = os.path.join(BASE_DIR, 'data', 'prompt_library.json')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    id TEXT PRIMARY KEY,
+    created_at TEXT,
+    created_ts INTEGER,
+    lang TEXT,
+    likes INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_created_ts ON tweets(created_ts);
+CREATE INDEX IF NOT EXISTS idx_tweets_likes ON tweets(likes);
+CREATE INDEX IF NOT EXISTS idx_tweets_lang ON tweets(lang);
+
+CREATE TABLE IF NOT EXISTS prompts (
+    hash TEXT PRIMARY KEY,
+    rank INTEGER,
+    tweet_url TEXT,
+    created_ts INTEGER,
+    lang TEXT,
+    likes INTEGER,
+    engagement_score REAL,
+    classified INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prompts_rank ON prompts(rank);
+CREATE INDEX IF NOT EXISTS idx_prompts_created_ts ON prompts(created_ts);
+CREATE INDEX IF NOT EXISTS idx_prompts_likes ON prompts(likes);
+CREATE INDEX IF NOT EXISTS idx_prompts_engagement ON prompts(engagement_score);
+CREATE INDEX IF NOT EXISTS idx_prompts_lang ON prompts(lang);
+CREATE INDEX IF NOT EXISTS idx_prompts_classified ON prompts(classified);
+
+CREATE TABLE IF NOT EXISTS prompt_tags (
+    hash TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (hash, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_prompt_tags_tag ON prompt_tags(tag);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def use_sqlite():
+    """是否启用 SQLite 后端"""
+    return os.getenv('STORAGE_BACKEND', 'json').lower() == 'sqlite'
+
+
+def prompt_hash(norm_prompt):
+    """prompt 主键：归一化文本的 sha1"""
+    return hashlib.sha1(norm_prompt.encode('utf-8')).hexdigest()
+
+
+def open_tweet_store():
+    """按配置返回推文存储（接口与 TweetStore 一致）"""
+    return SqliteStore() if use_sqlite() else TweetStore()
+
+
+class SqliteStore:
+    """SQLite 后端，推文部分与 TweetStore 接口一致"""
+
+    def __init__(self, db_file=DB_FILE):
+        self.root = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---- tweets ----
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM tweets').fetchone()[0]
+
+    def __contains__(self, tid):
+        return self.conn.execute('SELECT 1 FROM tweets WHERE id = ?', (tid,)).fetchone() is not None
+
+    def ids(self):
+        return {row[0] for row in self.conn.execute('SELECT id FROM tweets')}
+
+    def get(self, tid):
+        row = self.conn.execute('SELECT data FROM tweets WHERE id = ?', (tid,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def append_many(self, tweets):
+        """插入新推文，已存在的 id 跳过（先到先得），返回新增条数"""
+        rows = []
+        for tweet in tweets:
+            tid = tweet_key(tweet)
+            if not tid:
+                continue
+            created_at = tweet.get('createdAt', '')
+            rows.append((
+                tid, created_at, created_ts(created_at), tweet.get('lang', ''),
+                int(tweet.get('likeCount', 0) or 0), json.dumps(tweet, ensure_ascii=False),
+            ))
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO tweets (id, created_at, created_ts, lang, likes, data) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            return self.conn.total_changes - before
+
+    def iter_sorted(self, newest_first=True, skip_ids=None):
+        """按发布时间流式读取全部推文，skip_ids 中的推文不解析"""
+        order = 'DESC' if newest_first else 'ASC'
+        cur = self.conn.execute(f'SELECT id, data FROM tweets ORDER BY created_ts {order}, rowid ASC')
+        for row in cur:
+            if skip_ids and row['id'] in skip_ids:
+                continue
+            yield json.loads(row['data'])
+
+    def rewrite(self, transform):
+        """逐条调用 transform(tweet)（原地修改，有改动时返回 True），只更新有改动的行"""
+        rows = []
+        for row in self.conn.execute('SELECT id, data FROM tweets'):
+            tweet = json.loads(row['data'])
+            if transform(tweet):
+                rows.append((json.dumps(tweet, ensure_ascii=False), row['id']))
+        with self.conn:
+            self.conn.executemany('UPDATE tweets SET data = ? WHERE id = ?', rows)
+        return len(rows)
+
+    def export_json(self, output_file=LEGACY_FILE):
+        """导出 all_tweets.json"""
+        tmp_file = output_file + '.tmp'
+        count = 0
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for tweet in self.iter_sorted():
+                f.write(',\n' if count else '\n')
+                f.write(json.dumps(tweet, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n' if count else ']\n')
+        os.replace(tmp_file, output_file)
+        return count
+
+    # ---- prompts ----
+
+    def prompt_count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM prompts').fetchone()[0]
+
+    def get_prompt(self, key):
+        row = self.conn.execute('SELECT data FROM prompts WHERE hash = ?', (key,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def _prompt_row(self, key, rank, p, data):
+        return (
+            key, rank, p.get('tweet_url', ''), created_ts(p.get('created_at', '')), p.get('lang', ''),
+            int(p.get('likes', 0) or 0), float(p.get('engagement_score', 0) or 0),
+            1 if p.get('tags') else 0, data,
+        )
+
+    def _write_tags(self, key, tags):
+        self.conn.execute('DELETE FROM prompt_tags WHERE hash = ?', (key,))
+        self.conn.executemany('INSERT OR IGNORE INTO prompt_tags (hash, tag) VALUES (?, ?)',
+                              [(key, t) for t in tags])
+
+    def sync_prompts(self, keyed_prompts, metadata):
+        """
+        用提取结果同步 prompts 表：[(hash, prompt), ...]，顺序即展示顺序。
+        内容变了才重写整行和标签，只是排名变了单独更新 rank，删除不再出现的行。
+        返回 (写入, 改排名, 删除) 行数。
+        """
+        current = {row['hash']: (row['rank'], row['data'])
+                   for row in self.conn.execute('SELECT hash, rank, data FROM prompts')}
+        written = 0
+        reranked = []
+        with self.conn:
+            seen = set()
+            for rank, (key, p) in enumerate(keyed_prompts):
+                seen.add(key)
+                data = json.dumps(p, ensure_ascii=False)
+                old = current.get(key)
+                if old is not None and old[1] == data:
+                    if old[0] != rank:
+                        reranked.append((rank, key))
+                    continue
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO prompts (hash, rank, tweet_url, created_ts, lang, likes, '
+                    'engagement_score, classified, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    self._prompt_row(key, rank, p, data))
+                self._write_tags(key, p.get('tags', []))
+                written += 1
+            self.conn.executemany('UPDATE prompts SET rank = ? WHERE hash = ?', reranked)
+            stale = [k for k in current if k not in seen]
+            self.conn.executemany('DELETE FROM prompts WHERE hash = ?', [(k,) for k in stale])
+            self.conn.executemany('DELETE FROM prompt_tags WHERE hash = ?', [(k,) for k in stale])
+            self.set_meta('library_metadata', metadata)
+        return written, len(reranked), len(stale)
+
+    def unclassified_prompts(self):
+        """返回 [(hash, prompt)]，按展示顺序"""
+        cur = self.conn.execute('SELECT hash, data FROM prompts WHERE classified = 0 ORDER BY rank')
+        return [(row['hash'], json.loads(row['data'])) for row in cur]
+
+    def update_classification(self, key, p):
+        """只更新单条 prompt 的分类结果"""
+        with self.conn:
+            self.conn.execute('UPDATE prompts SET classified = ?, data = ? WHERE hash = ?',
+                              (1 if p.get('tags') else 0, json.dumps(p, ensure_ascii=False), key))
+            self._write_tags(key, p.get('tags', []))
+
+    def iter_prompts(self, order_by='rank'):
+        """按指定索引列流式读取 prompt"""
+        orders = {
+            'rank': 'rank ASC',
+            'likes': 'likes DESC, rank ASC',
+            'created': 'created_ts DESC, rank ASC',
+        }
+        cur = self.conn.execute(f'SELECT data FROM prompts ORDER BY {orders[order_by]}')
+        for row in cur:
+            yield json.loads(row['data'])
+
+    def top_prompts_by_likes(self, limit):
+        cur = self.conn.execute('SELECT data FROM prompts ORDER BY likes DESC, rank ASC LIMIT ?', (limit,))
+        return [json.loads(row['data']) for row in cur]
+
+    def count_prompts_since(self, ts):
+        return self.conn.execute('SELECT COUNT(*) FROM prompts WHERE created_ts > ?', (ts,)).fetchone()[0]
+
+    def load_library(self):
+        """组装与 prompt_library.json 相同结构的字典"""
+        return {
+            'metadata': self.get_meta('library_metadata') or {},
+            'prompts': list(self.iter_prompts()),
+        }
+
+    def get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row['value']) if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                          (key, json.dumps(value, ensure_ascii=False)))
+
+    def export_library(self, output_file=LIBRARY_FILE):
+        """导出 prompt_library.json"""
+        tmp_file = output_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.load_library(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, output_file)
+        return output_file
+
+
+def export_all():
+    """从数据库导出所有 JSON 产物"""
+    store = SqliteStore()
+    try:
+        count = store.export_json()
+        print(f"📤 已导出: {LEGACY_FILE} ({count} 条)")
+        store.export_library()
+        print(f"📤 已导出: {LIBRARY_FILE} ({store.prompt_count()} 条)")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='SQLite storage backend utilities')
+    parser.add_argument('command', choices=['export'], help='export: write JSON artifacts from the database')
+    args = parser.parse_args()
+    if args.command == 'export':
+        export_all()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+追加写入的推文存储，替代每天整体重写的 data/all_tweets.json。
+
+目录结构 data/tweets/：
+- seg-00001.jsonl ...  推文分段，每行一条，只追加不改写
+- index.tsv            id → (分段, 偏移, 长度, 时间戳) 索引，同样只追加
+
+去重只需查内存中的索引；按时间倒序读取全部推文通过 iter_sorted() 流式完成。
+"""
+
+import os
+import json
+import shutil
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.path.join(BASE_DIR, 'data', 'tweets')
+LEGACY_FILE = os.path.join(BASE_DIR, 'data', 'all_tweets.json')
+SEGMENT_MAX_BYTES = 32 * 1024 * 1024
+TWITTER_DATE_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+
+def tweet_key(tweet):
+    """推文去重主键：优先 id，其次 url"""
+    tid = tweet.get('id') or tweet.get('url', '')
+    return str(tid) if tid else ''
+
+
+def truncate_partial_line(path):
+    """截掉中断时写了一半的末行（最后一个换行之后的内容），返回截掉的字节数"""
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return 0
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            return 0
+        # 从尾部按块往前找最后一个换行
+        keep = 0
+        pos = end
+        while pos > 0:
+            step = min(64 * 1024, pos)
+            f.seek(pos - step)
+            nl = f.read(step).rfind(b'\n')
+            if nl != -1:
+                keep = pos - step + nl + 1
+                break
+            pos -= step
+        f.truncate(keep)
+        return end - keep
+
+
+def created_ts(created_at):
+    """解析 Twitter 时间格式为 Unix 时间戳，无法解析时返回 0"""
+    try:
+        return int(datetime.strptime(created_at, TWITTER_DATE_FORMAT).timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+class TweetStore:
+    """append-only 分段存储 + 磁盘 id 索引"""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.index_file = os.path.join(root, 'index.tsv')
+        # tid -> (segment, offset, length, ts)
+        self.index = {}
+        self._repaired = False
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_file):
+            return
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                # 没有换行结尾的末行可能是别的进程正在写、或中断时写了一半，不读
+                if not line.endswith('\n'):
+                    break
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) != 5:
+                    continue
+                tid, segment, offset, length, ts = parts
+                self.index[tid] = (segment, int(offset), int(length), int(ts))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, tid):
+        return tid in self.index
+
+    def ids(self):
+        """全部 tweet id 的集合（传给子进程用）"""
+        return set(self.index)
+
+    def _repair_tail(self):
+        """
+        写入前截掉中断时索引和最后一个分段留下的半行，否则下次追加会直接接在它后面。
+        只在写路径上做一次：只读的调用方不能动文件，可能有别的进程正在追加。
+        """
+        if self._repaired:
+            return
+        self._repaired = True
+        if not os.path.exists(self.index_file):
+            return
+        torn = truncate_partial_line(self.index_file)
+        segments = sorted(n for n in os.listdir(self.root) if n.startswith('seg-') and n.endswith('.jsonl'))
+        if segments:
+            torn += truncate_partial_line(self._segment_path(segments[-1]))
+        if torn:
+            print(f"🩹 推文存储: 截掉中断时写了一半的末行 ({torn} 字节)")
+
+    def _segment_path(self, segment):
+        return os.path.join(self.root, segment)
+
+    def _current_segment(self):
+        """返回可继续追加的分段名，超过大小上限时开新分段"""
+        segments = sorted(n for n in os.listdir(self.root) if n.startswith('seg-') and n.endswith('.jsonl'))
+        if segments:
+            last = segments[-1]
+            if os.path.getsize(self._segment_path(last)) < SEGMENT_MAX_BYTES:
+                return last
+            seq = int(last[4:9]) + 1
+        else:
+            seq = 1
+        return f'seg-{seq:05d}.jsonl'
+
+    def get(self, tid):
+        """按 id 读取单条推文"""
+        entry = self.index.get(tid)
+        if entry is None:
+            return None
+        segment, offset, length, _ = entry
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def append_many(self, tweets):
+        """
+        追加新推文，已存在的 id 跳过（先到先得）。
+        先写分段再写索引，中断时分段里多出的行没有索引引用，不影响读取。
+        返回实际追加条数。
+        """
+        os.makedirs(self.root, exist_ok=True)
+        self._repair_tail()
+        total = 0
+        seg = None
+        added = []
+        try:
+            for tweet in tweets:
+                tid = tweet_key(tweet)
+                if not tid or tid in self.index:
+                    continue
+                if seg is None:
+                    segment = self._current_segment()
+                    seg = open(self._segment_path(segment), 'ab')
+                    offset = seg.tell()
+                line = json.dumps(tweet, ensure_ascii=False).encode('utf-8') + b'\n'
+                seg.write(line)
+                entry = (segment, offset, len(line) - 1, created_ts(tweet.get('createdAt', '')))
+                self.index[tid] = entry
+                added.append((tid, entry))
+                offset += len(line)
+                if offset >= SEGMENT_MAX_BYTES:
+                    total += self._commit(seg, added)
+                    seg, added = None, []
+        finally:
+            if seg is not None:
+                total += self._commit(seg, added)
+        return total
+
+    def _commit(self, seg, added):
+        """落盘分段后再追加索引"""
+        seg.flush()
+        os.fsync(seg.fileno())
+        seg.close()
+        self._write_index(added)
+        return len(added)
+
+    def _write_index(self, entries):
+        if not entries:
+            return
+        with open(self.index_file, 'a', encoding='utf-8') as f:
+            for tid, (segment, offset, length, ts) in entries:
+                f.write(f'{tid}\t{segment}\t{offset}\t{length}\t{ts}\n')
+
+    def iter_sorted(self, newest_first=True, skip_ids=None):
+        """
+        按发布时间流式读取全部推文（默认最新在前），不在内存中持有全量列表。
+        skip_ids 中的推文不读取也不解析，其余推文的顺序不变。
+        """
+        entries = self.index.values() if not skip_ids else (
+            e for tid, e in self.index.items() if tid not in skip_ids)
+        order = sorted(entries, key=lambda e: e[3], reverse=newest_first)
+        handles = {}
+        try:
+            for segment, offset, length, _ in order:
+                f = handles.get(segment)
+                if f is None:
+                    f = handles[segment] = open(self._segment_path(segment), 'rb')
+                f.seek(offset)
+                yield json.loads(f.read(length))
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def rewrite(self, transform):
+        """
+        逐条调用 transform(tweet)（原地修改，有改动时返回 True），重写整个存储并保持写入顺序。
+        新存储先写到临时目录，完成后整体替换，中途失败不影响原存储。返回改动条数。
+        """
+        tmp_root = self.root + '.rewrite'
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        new_store = TweetStore(tmp_root)
+        changed = 0
+
+        def tweets():
+            nonlocal changed
+            for tid in list(self.index):
+                tweet = self.get(tid)
+                if transform(tweet):
+                    changed += 1
+                yield tweet
+
+        new_store.append_many(tweets())
+        if not changed:
+            shutil.rmtree(tmp_root)
+            return 0
+        old_root = self.root + '.old'
+        shutil.rmtree(old_root, ignore_errors=True)
+        os.replace(self.root, old_root)
+        os.replace(tmp_root, self.root)
+        shutil.rmtree(old_root)
+        self.index = new_store.index
+        return changed
+
+    def export_json(self, output_file=LEGACY_FILE):
+        """导出兼容旧格式的 all_tweets.json（流式写入）"""
+        tmp_file = output_file + '.tmp'
+        count = 0
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for tweet in self.iter_sorted():
+                f.write(',\n' if count else '\n')
+                f.write(json.dumps(tweet, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n' if count else ']\n')
+        os.replace(tmp_file, output_file)
+        return count